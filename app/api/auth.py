@@ -0,0 +1,22 @@
+"""
+auth.py
+
+Shared dependency for operator-only routes (ingestion, profiling).
+Requests must carry X-Admin-Token matching settings.ADMIN_TOKEN; when no
+token is configured these routes are refused outright.
+"""
+
+import hmac
+from typing import Optional
+
+from fastapi import Header, HTTPException, status
+
+from app.config.settings import get_settings
+
+settings = get_settings()
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin routes are disabled: ADMIN_TOKEN is not set.")
+    if not hmac.compare_digest(x_admin_token or "", settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token.")
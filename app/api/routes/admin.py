@@ -0,0 +1,37 @@
+"""
+admin.py
+
+Admin routes for retrieving request profiles captured by the profiling middleware.
+Requires the X-Admin-Token header; refused when settings.ADMIN_TOKEN is not set.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from app.api.auth import require_admin_token
+from app.config.settings import get_settings
+from app.utils.profiler import profile_store, to_collapsed
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+settings = get_settings()
+
+def require_admin(_: None = Depends(require_admin_token)):
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profiling is disabled.")
+
+@router.get("/profiles", summary="List captured request profiles", dependencies=[Depends(require_admin)])
+def list_profiles():
+    return {"profiles": profile_store.list()}
+
+@router.get("/profiles/{trace_id:path}", summary="Get a captured request profile", dependencies=[Depends(require_admin)])
+def get_profile(trace_id: str, format: str = Query("json", pattern="^(json|collapsed)$")):
+    """
+    Returns the stored profile for a trace ID, as JSON or as collapsed stacks
+    (format=collapsed) for flamegraph.pl or speedscope.
+    """
+    profile = profile_store.get(trace_id)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No profile for trace ID: {trace_id}")
+    if format == "collapsed":
+        return PlainTextResponse(to_collapsed(profile))
+    return profile
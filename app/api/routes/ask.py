@@ -19,6 +19,7 @@ class AskResponse(BaseModel):
     response: Optional[str]
     intent: str
     source_docs: Optional[List[str]] = None
+    duplicate_sources: Optional[List[str]] = None
     trace_id: str
     error: Optional[str] = None
 
@@ -33,6 +34,7 @@ async def ask(request: Request, body: AskRequest):
             response=result.get("response"),
             intent=result.get("intent", "unknown"),
             source_docs=result.get("source_docs"),
+            duplicate_sources=result.get("duplicate_sources"),
             trace_id=trace_id,
             error=result.get("error")
         )
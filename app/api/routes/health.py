@@ -1,7 +1,13 @@
 from fastapi import APIRouter
 
+from app.serving.memory import process_memory
+
 router = APIRouter()
 
 @router.get("/health", tags=["Health"])
 def health_check():
-    return {"status": "OK"}
\ No newline at end of file
+    return {"status": "OK"}
+
+@router.get("/health/memory", tags=["Health"])
+def memory_check():
+    return {"status": "OK", "memory": process_memory()}
\ No newline at end of file
@@ -0,0 +1,127 @@
+"""
+ingest.py
+
+FastAPI routes for background document ingestion.
+Jobs are queued onto a separate worker pool and polled by job ID; a finished
+job publishes a new FAISS index version that the RAG service hot-reloads.
+New documents are always added to settings.DOCS_PATH and the whole corpus is
+rebuilt, so an ingestion can never replace the live corpus with a subset.
+All routes require the admin token.
+"""
+
+import os
+import shutil
+from uuid import uuid4
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile, status
+from pydantic import BaseModel, Field
+
+from app.api.auth import require_admin_token
+from app.config.settings import get_settings
+from app.rag.ingestion_jobs import IngestionJobManager
+from app.utils.logger_utils import get_logger
+
+router = APIRouter(prefix="/ingest", tags=["Ingestion"], dependencies=[Depends(require_admin_token)])
+logger = get_logger("IngestRoute")
+settings = get_settings()
+
+job_manager = IngestionJobManager()
+
+class IngestRequest(BaseModel):
+    folder_path: str = Field(..., description="Folder under INGEST_ALLOWED_ROOT whose PDFs are added to the corpus.")
+
+class IngestJobStatus(BaseModel):
+    job_id: str
+    status: str
+    stage: Optional[str] = None
+    pdf_folder: str
+    chunks_done: int = 0
+    chunks_total: int = 0
+    cache_hits: int = 0
+    progress: float = 0.0
+    chunks_per_second: Optional[float] = None
+    index_version: Optional[str] = None
+    report: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+def _resolve_ingest_folder(folder_path: str) -> str:
+    """Resolves folder_path and rejects anything outside settings.INGEST_ALLOWED_ROOT."""
+    root = os.path.realpath(settings.INGEST_ALLOWED_ROOT)
+    folder = os.path.realpath(folder_path)
+    if os.path.commonpath([root, folder]) != root:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Folder must be inside {settings.INGEST_ALLOWED_ROOT}.")
+    if not os.path.isdir(folder):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Folder not found: {folder_path}")
+    return folder
+
+@router.post("", summary="Add a folder to the corpus and re-index", response_model=IngestJobStatus, status_code=status.HTTP_202_ACCEPTED)
+def ingest_folder(request: Request, body: IngestRequest):
+    """
+    Copies the PDFs of a folder under settings.INGEST_ALLOWED_ROOT into settings.DOCS_PATH
+    and queues a rebuild of the whole corpus, so existing documents stay indexed.
+    Declared sync so the file copies run in the threadpool, not on the event loop.
+
+    Args:
+        request: FastAPI request object for metadata and headers
+        body: JSON input with a 'folder_path' field
+
+    Returns:
+        IngestJobStatus for the queued job
+    """
+    trace_id = request.headers.get("X-Trace-ID") or str(uuid4())
+    folder = _resolve_ingest_folder(body.folder_path)
+
+    names = [name for name in os.listdir(folder) if name.lower().endswith(".pdf")]
+    if not names:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"No PDF files in {body.folder_path}")
+
+    os.makedirs(settings.DOCS_PATH, exist_ok=True)
+    for name in names:
+        source = os.path.join(folder, name)
+        target = os.path.join(settings.DOCS_PATH, name)
+        if os.path.realpath(source) != os.path.realpath(target):
+            shutil.copyfile(source, target)
+
+    job = job_manager.submit(settings.DOCS_PATH)
+    logger.info("Queued folder ingestion", extra={"trace_id": trace_id, "job_id": job["job_id"], "files": names})
+    return IngestJobStatus(**job)
+
+@router.post("/upload", summary="Upload PDFs and re-index the corpus", response_model=IngestJobStatus, status_code=status.HTTP_202_ACCEPTED)
+def ingest_upload(request: Request, files: List[UploadFile] = File(...)):
+    """
+    Saves uploaded PDFs into settings.DOCS_PATH and queues a rebuild of that corpus.
+    Unchanged chunks are served from the embedding cache, so only new content is encoded.
+    Declared sync so the file copies run in the threadpool, not on the event loop.
+
+    Args:
+        request: FastAPI request object for metadata and headers
+        files: One or more PDF files
+
+    Returns:
+        IngestJobStatus for the queued job
+    """
+    trace_id = request.headers.get("X-Trace-ID") or str(uuid4())
+
+    names = [os.path.basename(f.filename or "") for f in files]
+    if not names or any(not name.lower().endswith(".pdf") for name in names):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only .pdf files can be ingested.")
+
+    os.makedirs(settings.DOCS_PATH, exist_ok=True)
+    for name, upload in zip(names, files):
+        with open(os.path.join(settings.DOCS_PATH, name), "wb") as out:
+            shutil.copyfileobj(upload.file, out)
+
+    job = job_manager.submit(settings.DOCS_PATH)
+    logger.info("Queued upload ingestion", extra={"trace_id": trace_id, "job_id": job["job_id"], "files": names})
+    return IngestJobStatus(**job)
+
+@router.get("/{job_id}", summary="Ingestion job status", response_model=IngestJobStatus)
+def ingest_status(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown job: {job_id}")
+    return IngestJobStatus(**job)
@@ -4,6 +4,8 @@ from fastapi import APIRouter
 from app.api.routes.health import router as health_router
 from app.api.routes.ask import router as ask_router
 from app.api.routes.classify import router as classify_router
+from app.api.routes.ingest import router as ingest_router
+from app.api.routes.admin import router as admin_router
 
 router = APIRouter()
 
@@ -11,11 +13,15 @@ router = APIRouter()
 router.include_router(health_router)
 router.include_router(ask_router)
 router.include_router(classify_router)
+router.include_router(ingest_router)
+router.include_router(admin_router)
 
 def get_all_routers() -> list[APIRouter]:
     return [
         health_router,
         ask_router,
         classify_router,
+        ingest_router,
+        admin_router,
     ]
 
@@ -21,11 +21,55 @@ class Settings(BaseSettings):
     TOP_K: int = Field(3, description="Number of top documents to retrieve in RAG")
     FAISS_INDEX_PATH: str = Field("data/faiss_index", description="Path to local FAISS index")
     FAISS_ALLOW_UNSAFE_LOAD: bool = Field(True, description="Allow unsafe deserialization for FAISS index")
+    INDEX_PRECISION: str = Field("float32", description="Vector storage in the FAISS index: float32 | float16 | int8 | pq")
+    INDEX_PCA_DIM: int = Field(0, description="Reduce vectors to this many dimensions with PCA before storage (0 = off)")
+    INDEX_PQ_M: int = Field(0, description="Sub-quantizers for pq precision; must divide the vector dimension (0 = auto)")
+    INDEX_RERANK_FACTOR: int = Field(4, description="Candidates per result re-scored at full precision for compressed indexes (1 = off)")
+    INDEX_KEEP_VERSIONS: int = Field(3, description="Published index versions kept on disk under FAISS_INDEX_PATH/versions")
+    INDEX_RELOAD_CHECK_SECONDS: float = Field(5.0, description="How often RAGService checks for a newly published index version")
+
+    # Retrieval cache
+    RETRIEVAL_CACHE_ENABLED: bool = Field(True, description="Cache FAISS retrieval results per index version and normalized query")
+    RETRIEVAL_CACHE_MAX_ENTRIES: int = Field(2048, description="Retrieval results kept per process (and in the shared store)")
+    RETRIEVAL_CACHE_TTL_SECONDS: float = Field(3600, description="Lifetime of a cached retrieval result (0 = no expiry)")
+    RETRIEVAL_CACHE_SHARED_PATH: str = Field("", description="SQLite file to share retrieval results across workers (empty = per-process only)")
 
     # Document Ingestion
     DOCS_PATH: str = Field("data/source_pdfs", description="Path to source PDFs for ingestion")
     CHUNK_SIZE: int = Field(1000, description="Chunk size for document splitting")
     CHUNK_OVERLAP: int = Field(200, description="Chunk overlap for text splitting")
+    DEDUP_ENABLED: bool = Field(True, description="Drop exact and near-duplicate chunks before embedding")
+    DEDUP_THRESHOLD: float = Field(0.85, description="MinHash Jaccard similarity at which chunks count as duplicates")
+    DEDUP_NUM_PERM: int = Field(128, description="Number of MinHash permutations per chunk signature")
+    DEDUP_SHINGLE_SIZE: int = Field(5, description="Words per shingle for near-duplicate detection")
+
+    # Background ingestion jobs
+    INGEST_MAX_WORKERS: int = Field(1, description="Ingestion worker processes per API process (each gunicorn worker has its own pool)")
+    INGEST_NODE_MAX_JOBS: int = Field(1, description="Ingestion jobs allowed to run at once across all API processes on the node")
+    INGEST_ALLOWED_ROOT: str = Field("data", description="POST /ingest only accepts folders inside this directory")
+    INGEST_THREADS: int = Field(2, description="CPU threads each ingestion worker may use for embedding")
+    INGEST_NICE: int = Field(10, description="Niceness added to ingestion workers so queries keep priority")
+    INGEST_JOBS_PATH: str = Field("data/ingest_jobs", description="Folder holding ingestion job status files")
+    INGEST_MAX_STORED_JOBS: int = Field(200, description="Status files kept in INGEST_JOBS_PATH; oldest are deleted beyond this")
+
+    # Embedding cache
+    EMBED_CACHE_ENABLED: bool = Field(True, description="Reuse embeddings of unchanged chunk texts across index builds")
+    EMBED_CACHE_PATH: str = Field("data/embedding_cache", description="Folder for the on-disk embedding cache")
+    EMBED_CACHE_MAX_MB: int = Field(1024, description="Size cap per embedding model in MB before LRU eviction (0 = unlimited)")
+    EMBED_BATCH_SIZE: int = Field(256, description="Chunks embedded per batch during index builds; progress is reported after each")
+
+    # Serving (see app/serving/gunicorn_conf.py)
+    SERVING_WORKERS: int = Field(0, description="Gunicorn workers forked from the preloaded master (0 = CPU count)")
+    SERVING_TORCH_THREADS: int = Field(0, description="Torch intra-op threads per worker (0 = CPU count / workers)")
+
+    # Profiling (served by /admin/profiles)
+    PROFILING_ENABLED: bool = Field(False, description="Sample request stacks and keep profiles of sampled or slow requests")
+    PROFILE_SAMPLE_RATE: float = Field(0.01, description="Fraction of requests whose profile is kept regardless of latency")
+    PROFILE_SLOW_THRESHOLD_MS: float = Field(2000, description="Requests slower than this always keep their profile")
+    PROFILE_INTERVAL_MS: float = Field(5, description="Stack sampling interval in milliseconds")
+    PROFILE_STORE_PATH: str = Field("data/profiles", description="Folder holding captured profiles, one file per trace ID")
+    PROFILE_MAX_STORED: int = Field(200, description="Captured profiles kept before the oldest are deleted")
+    ADMIN_TOKEN: str = Field("", repr=False, description="Token required in X-Admin-Token for /admin and /ingest routes (empty = those routes are refused)")
 
     # Secrets (auto-loaded from .env or system environment)
     OPENAI_API_KEY: str = Field(..., repr=False, description="API key for OpenAI GPT")
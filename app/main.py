@@ -4,6 +4,11 @@ load_env()
 
 from fastapi import FastAPI
 from app.api.routes.router_registry import router
+from app.config.settings import get_settings
+from app.utils.profiler import profile_requests
 
 app = FastAPI()
-app.include_router(router)
\ No newline at end of file
+app.include_router(router)
+
+if get_settings().PROFILING_ENABLED:
+    app.middleware("http")(profile_requests)
\ No newline at end of file
@@ -11,6 +11,9 @@ from app.utils.logger_utils import get_logger
 
 logger = get_logger("LLMOrchestrator")
 
+# Boilerplate such as a legal footer can be collapsed from hundreds of files.
+MAX_DUPLICATE_SOURCES = 10
+
 
 class LLMOrchestrator:
     def __init__(self, config: dict = None):
@@ -37,6 +40,23 @@ class LLMOrchestrator:
             logger.exception("Failed to initialize RAGService.")
             raise e
 
+    @staticmethod
+    def _duplicate_source_names(source_docs: list) -> list:
+        """
+        Other files that held a duplicate of a retrieved chunk and were collapsed onto
+        it at indexing time, capped at MAX_DUPLICATE_SOURCES.
+        """
+        retrieved = {doc.get("source", "unknown") for doc in source_docs}
+        names = []
+        for doc in source_docs:
+            for source in doc.get("duplicate_sources") or []:
+                filename = source.get("filename", "unknown")
+                if filename not in retrieved and filename not in names:
+                    names.append(filename)
+                    if len(names) == MAX_DUPLICATE_SOURCES:
+                        return names
+        return names
+
     def handle_query(self, query: str, trace_id: str = None) -> dict:
         try:
             # Force intent for now; replace with actual classifier if needed
@@ -62,6 +82,7 @@ class LLMOrchestrator:
                     "response": response_text,
                     "intent": intent,
                     "source_docs": [doc.get("source", "unknown") for doc in source_docs],
+                    "duplicate_sources": self._duplicate_source_names(source_docs),
                     "error": error,
                 }
 
@@ -0,0 +1,220 @@
+"""
+deduplicator.py
+
+Removes exact and near-duplicate chunks before they are embedded.
+Exact copies are caught with a content hash, near copies (boilerplate
+headers, legal footers, the same policy in several files) with MinHash
+signatures bucketed through LSH banding. One canonical chunk is kept per
+group and records every page it was seen on in its metadata.
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import numpy as np
+from langchain.schema import Document
+
+from app.utils.logger_utils import get_logger
+
+logger = get_logger("Deduplicator")
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+@dataclass
+class DedupReport:
+    """
+    Summary of a deduplication pass.
+    Attributes:
+        total_chunks (int): Chunks received.
+        exact_duplicates (int): Chunks dropped because their normalized text was identical.
+        near_duplicates (int): Chunks dropped because their MinHash similarity passed the threshold.
+        chars_removed (int): Characters no longer sent to the embedding model.
+    """
+    total_chunks: int = 0
+    exact_duplicates: int = 0
+    near_duplicates: int = 0
+    chars_removed: int = 0
+
+    @property
+    def removed(self) -> int:
+        return self.exact_duplicates + self.near_duplicates
+
+    @property
+    def kept(self) -> int:
+        return self.total_chunks - self.removed
+
+    @property
+    def removed_ratio(self) -> float:
+        return self.removed / self.total_chunks if self.total_chunks else 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "total_chunks": self.total_chunks,
+            "kept": self.kept,
+            "exact_duplicates": self.exact_duplicates,
+            "near_duplicates": self.near_duplicates,
+            "removed_ratio": round(self.removed_ratio, 4),
+            "chars_removed": self.chars_removed,
+        }
+
+
+class MinHashDeduplicator:
+    """
+    Greedy chunk deduplicator using exact hashing plus MinHash/LSH.
+    Attributes:
+        threshold (float): Estimated Jaccard similarity at or above which two chunks are duplicates.
+        num_perm (int): Number of MinHash permutations per signature.
+        shingle_size (int): Number of words per shingle.
+    """
+
+    def __init__(self, threshold: float = 0.85, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("threshold must be in (0, 1].")
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = self._optimal_bands(threshold, num_perm)
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    @staticmethod
+    def _optimal_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+        """
+        Picks the (bands, rows) split whose LSH S-curve midpoint sits just
+        below the threshold, so candidates are over- rather than under-generated.
+        """
+        best = (num_perm, 1)
+        best_gap = float("inf")
+        for rows in range(1, num_perm + 1):
+            if num_perm % rows:
+                continue
+            bands = num_perm // rows
+            midpoint = (1.0 / bands) ** (1.0 / rows)
+            gap = threshold - midpoint
+            if 0 <= gap < best_gap:
+                best, best_gap = (bands, rows), gap
+        return best
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return re.sub(r"\s+", " ", text.strip().lower())
+
+    def _shingles(self, normalized: str) -> List[str]:
+        words = normalized.split(" ")
+        if len(words) <= self.shingle_size:
+            return [normalized]
+        return [" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)]
+
+    def signature(self, normalized: str) -> np.ndarray:
+        hashes = np.array(
+            [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+             for s in set(self._shingles(normalized))],
+            dtype=np.uint64,
+        )
+        # Overflow in a * h wraps modulo 2**64, which is the standard MinHash trick.
+        with np.errstate(over="ignore"):
+            permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0)
+
+    def deduplicate(self, chunks: List[Document]) -> Tuple[List[Document], DedupReport]:
+        """
+        Collapses duplicate chunks onto the first occurrence.
+        Args: chunks (List[Document]): Split chunks in ingestion order.
+        Returns: Tuple[List[Document], DedupReport]: Canonical chunks (with 'sources' and
+                 'duplicate_count' metadata) and a summary of what was removed.
+        """
+        report = DedupReport(total_chunks=len(chunks))
+        kept: List[Document] = []
+        exact_index: Dict[str, int] = {}
+        signatures: List[np.ndarray] = []
+        buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+
+        for chunk in chunks:
+            normalized = self.normalize(chunk.page_content)
+            digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+            if digest in exact_index:
+                self._attach_source(kept[exact_index[digest]], chunk)
+                report.exact_duplicates += 1
+                report.chars_removed += len(chunk.page_content)
+                continue
+
+            signature = self.signature(normalized)
+            band_keys = [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+            match = self._find_near_duplicate(signature, band_keys, buckets, signatures)
+            if match is not None:
+                self._attach_source(kept[match], chunk)
+                exact_index[digest] = match
+                report.near_duplicates += 1
+                report.chars_removed += len(chunk.page_content)
+                continue
+
+            position = len(kept)
+            chunk.metadata["content_hash"] = digest
+            chunk.metadata["sources"] = [self._source_of(chunk)]
+            chunk.metadata["duplicate_count"] = 0
+            kept.append(chunk)
+            signatures.append(signature)
+            exact_index[digest] = position
+            for band, key in zip(buckets, band_keys):
+                band.setdefault(key, []).append(position)
+
+        return kept, report
+
+    def _find_near_duplicate(self, signature, band_keys, buckets, signatures):
+        candidates = set()
+        for band, key in zip(buckets, band_keys):
+            candidates.update(band.get(key, ()))
+
+        best, best_score = None, self.threshold
+        for candidate in sorted(candidates):
+            score = float(np.mean(signatures[candidate] == signature))
+            if score >= best_score:
+                best, best_score = candidate, score
+        return best
+
+    @staticmethod
+    def _source_of(chunk: Document) -> Dict[str, object]:
+        return {
+            "filename": chunk.metadata.get("filename", "unknown"),
+            "page_number": chunk.metadata.get("page_number", "n/a"),
+        }
+
+    def _attach_source(self, canonical: Document, duplicate: Document) -> None:
+        source = self._source_of(duplicate)
+        if source not in canonical.metadata["sources"]:
+            canonical.metadata["sources"].append(source)
+        canonical.metadata["duplicate_count"] += 1
+
+
+def deduplicate_chunks(
+    chunks: List[Document],
+    threshold: float = 0.85,
+    num_perm: int = 128,
+    shingle_size: int = 5
+) -> Tuple[List[Document], DedupReport]:
+    """
+    Convenience wrapper around MinHashDeduplicator that also logs the report.
+    Args:
+        chunks (List[Document]): Split chunks to deduplicate.
+        threshold (float): Near-duplicate Jaccard threshold.
+        num_perm (int): MinHash permutations.
+        shingle_size (int): Words per shingle.
+    Returns: Tuple[List[Document], DedupReport]: Canonical chunks and removal report.
+    """
+    deduplicator = MinHashDeduplicator(threshold=threshold, num_perm=num_perm, shingle_size=shingle_size)
+    kept, report = deduplicator.deduplicate(chunks)
+    logger.info(
+        f"Deduplicated {report.total_chunks} chunks -> {report.kept} "
+        f"({report.exact_duplicates} exact, {report.near_duplicates} near, "
+        f"{report.removed_ratio:.1%} removed, {report.chars_removed} chars saved)"
+    )
+    return kept, report
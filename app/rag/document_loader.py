@@ -6,12 +6,13 @@ for embedding and vector search using LangChain.
 """
 
 import os
-from typing import List
+from typing import List, Optional, Tuple
 from langchain_community.document_loaders import PyPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
 
 from app.config.settings import get_settings
+from app.rag.deduplicator import DedupReport, deduplicate_chunks
 from app.utils.logger_utils import get_logger
 
 logger = get_logger("DocumentLoader")
@@ -20,19 +21,34 @@ settings = get_settings()
 
 def load_and_split_documents(pdf_folder: str = None) -> List[Document]:
     """
-    Loads all PDF documents from a folder, extracts their text, attaches metadata,
-    and splits them into chunks using RecursiveCharacterTextSplitter.
+    Loads and splits the PDFs in a folder. See load_and_split_documents_with_report.
 
     Args:pdf_folder (str, optional): Folder path containing PDFs.
             If not provided, falls back to settings.DOCS_PATH.
     Returns:List[Document]: List of LangChain Document chunks ready for embedding.
     """
+    chunks, _ = load_and_split_documents_with_report(pdf_folder)
+    return chunks
+
+
+def load_and_split_documents_with_report(pdf_folder: str = None) -> Tuple[List[Document], Optional[DedupReport]]:
+    """
+    Loads all PDF documents from a folder, extracts their text, attaches metadata,
+    and splits them into chunks using RecursiveCharacterTextSplitter. When
+    settings.DEDUP_ENABLED is set, duplicate chunks are collapsed onto one canonical
+    chunk whose 'sources' metadata lists every page it appeared on.
+
+    Args:pdf_folder (str, optional): Folder path containing PDFs.
+            If not provided, falls back to settings.DOCS_PATH.
+    Returns:Tuple[List[Document], Optional[DedupReport]]: Document chunks ready for
+            embedding, and the deduplication report (None when dedup is disabled).
+    """
     folder_path = pdf_folder or settings.DOCS_PATH
     docs = []
 
     if not os.path.exists(folder_path):
         logger.error(f"Folder does not exist: {folder_path}")
-        return []
+        return [], None
 
     logger.info(f"Scanning folder: {folder_path}")
 
@@ -55,7 +71,7 @@ def load_and_split_documents(pdf_folder: str = None) -> List[Document]:
 
     if not docs:
         logger.warning("No PDF documents were loaded.")
-        return []
+        return [], None
 
     logger.info(f"Loaded {len(docs)} pages from {len(os.listdir(folder_path))} PDF files.")
 
@@ -68,4 +84,14 @@ def load_and_split_documents(pdf_folder: str = None) -> List[Document]:
     chunks = text_splitter.split_documents(docs)
 
     logger.info(f"Split into {len(chunks)} total chunks.")
-    return chunks
+
+    dedup_report = None
+    if settings.DEDUP_ENABLED:
+        chunks, dedup_report = deduplicate_chunks(
+            chunks,
+            threshold=settings.DEDUP_THRESHOLD,
+            num_perm=settings.DEDUP_NUM_PERM,
+            shingle_size=settings.DEDUP_SHINGLE_SIZE
+        )
+
+    return chunks, dedup_report
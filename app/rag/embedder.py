@@ -4,12 +4,16 @@ then stores the vectors in a FAISS index locally for future retrieval.
 """
 
 import os
-from typing import Optional
+import shutil
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from langchain_community.vectorstores import FAISS
+import numpy as np
 from langchain_community.embeddings import HuggingFaceEmbeddings
 
-from app.rag.document_loader import load_and_split_documents
+from app.rag.document_loader import load_and_split_documents_with_report
+from app.rag.embedding_cache import CachedEmbeddings, EmbeddingCache
+from app.rag.index_compression import build_vector_store, save_vector_store
+from app.rag.index_registry import new_version, prune_versions, publish_version
 from app.config.settings import get_settings
 from app.utils.logger_utils import get_logger
 
@@ -17,6 +21,132 @@ logger = get_logger("Embedder")
 settings = get_settings()
 
 
+def build_embeddings(embedding_model: str):
+    """
+    Returns the embedding function used for indexing, wrapped in the on-disk
+    embedding cache when settings.EMBED_CACHE_ENABLED is set. The HuggingFace
+    model is only loaded if some chunk is missing from the cache.
+    """
+    if not settings.EMBED_CACHE_ENABLED:
+        return HuggingFaceEmbeddings(model_name=embedding_model)
+
+    cache = EmbeddingCache(
+        settings.EMBED_CACHE_PATH,
+        embedding_model,
+        max_bytes=settings.EMBED_CACHE_MAX_MB * 1024 * 1024
+    )
+    return CachedEmbeddings(cache, lambda: HuggingFaceEmbeddings(model_name=embedding_model))
+
+
+ProgressCallback = Callable[[str, int, int, int], None]
+
+
+def _report(
+    progress_callback: Optional[ProgressCallback],
+    stage: str,
+    done: int = 0,
+    total: int = 0,
+    cache_hits: int = 0
+) -> None:
+    if progress_callback:
+        progress_callback(stage, done, total, cache_hits)
+
+
+def _embed_in_batches(
+    embeddings: Any,
+    texts: List[str],
+    batch_size: int,
+    progress_callback: Optional[ProgressCallback] = None
+) -> np.ndarray:
+    """
+    Embeds texts batch by batch, reporting progress after each batch. Chunks served
+    from the embedding cache are reported separately so throughput reflects encoding only.
+    """
+    vectors = []
+    cache_hits = 0
+    for start in range(0, len(texts), batch_size):
+        batch = texts[start:start + batch_size]
+        hits_before = embeddings.hits if isinstance(embeddings, CachedEmbeddings) else 0
+        vectors.append(np.asarray(embeddings.embed_documents(batch), dtype=np.float32))
+        if isinstance(embeddings, CachedEmbeddings):
+            cache_hits += embeddings.hits - hits_before
+        _report(progress_callback, "embedding", start + len(batch), len(texts), cache_hits)
+    return np.concatenate(vectors)
+
+
+def build_index(
+    pdf_folder: str,
+    index_path: str,
+    embedding_model: str,
+    progress_callback: Optional[ProgressCallback] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Loads, embeds and indexes the PDFs in a folder, raising on failure.
+
+    Args:
+        pdf_folder (str): Path to PDF folder.
+        index_path (str): Folder to save the FAISS index into.
+        embedding_model (str): HuggingFace model to use.
+        progress_callback (callable, optional): Called as (stage, done, total, cache_hits)
+            while the build moves through the loading, embedding, indexing and saving stages;
+            during embedding it is called after every settings.EMBED_BATCH_SIZE chunks.
+
+    Returns:
+        Optional[Dict[str, Any]]: Build report (index stats and, when enabled, the
+        deduplication report), or None if there was nothing to index.
+    """
+    if not os.path.isdir(pdf_folder):
+        raise FileNotFoundError(f"PDF folder not found: {pdf_folder}")
+
+    _report(progress_callback, "loading")
+    logger.info(f"Loading documents from: {pdf_folder}")
+    docs, dedup_report = load_and_split_documents_with_report(pdf_folder)
+
+    if not docs:
+        logger.warning("No documents found to embed.")
+        return None
+
+    logger.info(f"Total document chunks: {len(docs)}")
+    for i, doc in enumerate(docs[:3]):
+        logger.debug(f"[Sample Chunk {i+1}] {doc.page_content[:200]}")
+
+    logger.info(f"Using embedding model: {embedding_model}")
+    embeddings = build_embeddings(embedding_model)
+
+    _report(progress_callback, "embedding", 0, len(docs))
+    vectors = _embed_in_batches(
+        embeddings,
+        [doc.page_content for doc in docs],
+        max(settings.EMBED_BATCH_SIZE, 1),
+        progress_callback
+    )
+
+    _report(progress_callback, "indexing", len(docs), len(docs))
+    logger.info(f"Creating FAISS vector index ({settings.INDEX_PRECISION})...")
+    vector_store, report = build_vector_store(
+        docs,
+        vectors,
+        embeddings,
+        precision=settings.INDEX_PRECISION,
+        pca_dim=settings.INDEX_PCA_DIM,
+        pq_m=settings.INDEX_PQ_M,
+        rerank_factor=settings.INDEX_RERANK_FACTOR,
+        recall_k=settings.TOP_K
+    )
+    if dedup_report is not None:
+        report["dedup"] = dedup_report.to_dict()
+
+    _report(progress_callback, "saving", len(docs), len(docs))
+    logger.info(f"Saving FAISS index to: {index_path}")
+    save_vector_store(vector_store, index_path, report)
+
+    if isinstance(embeddings, CachedEmbeddings):
+        logger.info(f"Embedding cache hits: {embeddings.hits}, encoded: {embeddings.misses}")
+
+    logger.info(f"FAISS index saved at: {index_path}")
+    return report
+
+
 def embed_and_store(
     pdf_folder: Optional[str] = None,
     index_path: Optional[str] = None,
@@ -24,6 +154,8 @@ def embed_and_store(
 ) -> Optional[str]:
     """
     Loads and embeds documents from a folder and stores the vector index using FAISS.
+    Vector storage precision (float32, float16, int8, pq, optional PCA) follows the
+    INDEX_* settings; the build report is written to index_meta.json in the index folder.
 
     Args:
         pdf_folder (str, optional): Path to PDF folder. Defaults to settings.DOCS_PATH.
@@ -34,38 +166,57 @@ def embed_and_store(
         Optional[str]: Path to saved FAISS index, or None if failure occurred.
     """
     try:
-        pdf_folder = pdf_folder or settings.DOCS_PATH
         index_path = index_path or settings.FAISS_INDEX_PATH
-        embedding_model = embedding_model or settings.EMBED_MODEL
-
-        if not os.path.isdir(pdf_folder):
-            logger.error(f"PDF folder not found: {pdf_folder}")
-            return None
-
-        logger.info(f"Loading documents from: {pdf_folder}")
-        docs = load_and_split_documents(pdf_folder)
+        report = build_index(
+            pdf_folder or settings.DOCS_PATH,
+            index_path,
+            embedding_model or settings.EMBED_MODEL
+        )
+        return index_path if report else None
 
-        if not docs:
-            logger.warning("No documents found to embed.")
-            return None
-
-        logger.info(f"Total document chunks: {len(docs)}")
-        for i, doc in enumerate(docs[:3]):
-            logger.debug(f"[Sample Chunk {i+1}] {doc.page_content[:200]}")
+    except Exception as e:
+        logger.exception("Embedding and indexing failed.", extra={"error": str(e)})
+        return None
 
-        logger.info(f"Using embedding model: {embedding_model}")
-        embeddings = HuggingFaceEmbeddings(model_name=embedding_model)
 
-        logger.info("Creating FAISS vector index...")
-        vector_store = FAISS.from_documents(docs, embeddings)
+def embed_and_publish(
+    pdf_folder: Optional[str] = None,
+    index_root: Optional[str] = None,
+    embedding_model: Optional[str] = None,
+    progress_callback: Optional[ProgressCallback] = None
+) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    Builds the index into a new version folder under index_root and publishes it,
+    so running RAGService instances pick it up without a restart. Raises on failure.
 
-        os.makedirs(index_path, exist_ok=True)
-        logger.info(f"Saving FAISS index to: {index_path}")
-        vector_store.save_local(index_path)
+    Args:
+        pdf_folder (str, optional): Path to PDF folder. Defaults to settings.DOCS_PATH.
+        index_root (str, optional): Root index folder. Defaults to settings.FAISS_INDEX_PATH.
+        embedding_model (str, optional): HuggingFace model to use. Defaults to settings.EMBED_MODEL.
+        progress_callback (callable, optional): See build_index.
 
-        logger.info(f"FAISS index saved at: {index_path}")
-        return index_path
+    Returns:
+        Optional[Tuple[str, Dict[str, Any]]]: Published version and build report,
+        or None if there was nothing to index.
+    """
+    index_root = index_root or settings.FAISS_INDEX_PATH
+    version, path = new_version(index_root)
 
-    except Exception as e:
-        logger.exception("Embedding and indexing failed.", extra={"error": str(e)})
+    try:
+        report = build_index(
+            pdf_folder or settings.DOCS_PATH,
+            path,
+            embedding_model or settings.EMBED_MODEL,
+            progress_callback=progress_callback
+        )
+    except Exception:
+        shutil.rmtree(path, ignore_errors=True)
+        raise
+
+    if not report:
+        shutil.rmtree(path, ignore_errors=True)
         return None
+
+    publish_version(index_root, version)
+    prune_versions(index_root, settings.INDEX_KEEP_VERSIONS)
+    return version, report
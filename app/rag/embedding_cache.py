@@ -0,0 +1,300 @@
+"""
+embedding_cache.py
+
+Persistent, content-addressed cache of chunk embeddings.
+
+Vectors are stored per embedding model as float32 rows in an append-only
+file that is read through a memory map, next to a JSON index mapping the
+SHA-256 of each chunk text to its row. Rebuilding an index whose chunk
+texts have not changed therefore never loads the embedding model.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.utils.logger_utils import get_logger
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+logger = get_logger("EmbeddingCache")
+
+VECTORS_FILE = "vectors.f32"
+INDEX_FILE = "index.json"
+LOCK_FILE = ".lock"
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    On-disk embedding cache for a single embedding model.
+    Attributes:
+        model_name (str): Embedding model the vectors belong to.
+        directory (str): Folder holding this model's vector file and index.
+        max_bytes (int): Size cap for the vector file; 0 disables the cap.
+    """
+
+    def __init__(self, cache_path: str, model_name: str, max_bytes: int = 0):
+        self.model_name = model_name
+        self.max_bytes = max_bytes
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)[-64:]
+        self.directory = os.path.join(cache_path, f"{slug}-{text_hash(model_name)[:12]}")
+        self._vectors_path = os.path.join(self.directory, VECTORS_FILE)
+        self._index_path = os.path.join(self.directory, INDEX_FILE)
+        self._thread_lock = threading.Lock()
+
+        os.makedirs(self.directory, exist_ok=True)
+        with self._locked(shared=True):
+            self._load_index()
+
+    @contextmanager
+    def _locked(self, shared: bool = False):
+        """
+        Serializes access across threads and, where supported, processes.
+        Readers take a shared lock so no writer can append or compact under them.
+        """
+        with self._thread_lock, open(os.path.join(self.directory, LOCK_FILE), "a") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load_index(self) -> None:
+        self.dim: Optional[int] = None
+        self.rows = 0
+        self.entries: Dict[str, List[float]] = {}
+        self._loaded_stamp = self._index_stamp()
+
+        if os.path.exists(self._index_path):
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.dim = data.get("dim")
+            self.rows = data.get("rows", 0)
+            self.entries = data.get("entries", {})
+
+    def _truncate_orphans(self) -> None:
+        """
+        Drops rows appended by a writer that died before saving the index.
+        Must only run under the exclusive lock: a live writer may have appended
+        rows it has not indexed yet.
+        """
+        expected = self.rows * (self.dim or 0) * 4
+        if os.path.exists(self._vectors_path) and os.path.getsize(self._vectors_path) != expected:
+            logger.warning(f"Truncating embedding cache vector file to {expected} bytes: {self._vectors_path}")
+            with open(self._vectors_path, "r+b") as f:
+                f.truncate(expected)
+
+    def _index_stamp(self) -> Optional[Tuple[int, int, int]]:
+        # The index is replaced atomically, so a new inode marks a new save even
+        # when two saves land within the filesystem's mtime resolution.
+        try:
+            stat = os.stat(self._index_path)
+            return stat.st_ino, stat.st_mtime_ns, stat.st_size
+        except FileNotFoundError:
+            return None
+
+    def _refresh(self) -> None:
+        """Reloads the index if another process saved it, keeping our newer last-used times."""
+        if self._index_stamp() == self._loaded_stamp:
+            return
+        touched = self.entries
+        self._load_index()
+        for key, entry in self.entries.items():
+            previous = touched.get(key)
+            if previous is not None:
+                entry[1] = max(entry[1], previous[1])
+
+    def _save_index(self) -> None:
+        tmp_path = f"{self._index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"model_name": self.model_name, "dim": self.dim, "rows": self.rows, "entries": self.entries}, f)
+        os.replace(tmp_path, self._index_path)
+        self._loaded_stamp = self._index_stamp()
+
+    @property
+    def size_bytes(self) -> int:
+        return self.rows * (self.dim or 0) * 4
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Looks up cached vectors for the given texts.
+        Args: texts (List[str]): Chunk texts.
+        Returns: List[Optional[np.ndarray]]: A float32 vector per text, or None on a miss.
+        """
+        results: List[Optional[np.ndarray]] = [None] * len(texts)
+
+        with self._locked(shared=True):
+            # Another process may have appended or compacted (renumbering rows) since we last looked.
+            self._refresh()
+            if not self.rows:
+                return results
+
+            vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(self.rows, self.dim))
+            now = time.time()
+            for i, text in enumerate(texts):
+                entry = self.entries.get(text_hash(text))
+                if entry is not None:
+                    results[i] = np.array(vectors[int(entry[0])])
+                    entry[1] = now
+            del vectors
+        return results
+
+    def put_many(self, texts: List[str], vectors: np.ndarray) -> None:
+        """
+        Appends vectors for texts not already cached, then enforces the size cap.
+        Args:
+            texts (List[str]): Chunk texts.
+            vectors (np.ndarray): Matrix of shape (len(texts), dim).
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not len(texts):
+            return
+
+        with self._locked():
+            self._refresh()
+            self._truncate_orphans()
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Vector dimension {vectors.shape[1]} does not match cache dimension {self.dim}.")
+
+            now = time.time()
+            new_rows = []
+            for text, vector in zip(texts, vectors):
+                key = text_hash(text)
+                if key in self.entries:
+                    continue
+                self.entries[key] = [self.rows + len(new_rows), now]
+                new_rows.append(vector)
+
+            if new_rows:
+                with open(self._vectors_path, "ab") as f:
+                    f.write(np.stack(new_rows).tobytes())
+                self.rows += len(new_rows)
+
+            self._save_index()
+            if self.max_bytes and self.size_bytes > self.max_bytes:
+                self._collect_garbage()
+
+    def touch(self) -> None:
+        """Persists last-used timestamps updated by get_many."""
+        with self._locked():
+            self._refresh()
+            self._save_index()
+
+    def collect_garbage(self) -> None:
+        """Evicts least recently used vectors until the cache fits max_bytes."""
+        with self._locked():
+            self._refresh()
+            self._collect_garbage()
+
+    def _collect_garbage(self) -> None:
+        if not self.rows:
+            return
+
+        row_bytes = self.dim * 4
+        budget = self.max_bytes // row_bytes if self.max_bytes else self.rows
+        # Keep ~90% of the cap so the next build doesn't immediately trigger another pass.
+        budget = int(budget * 0.9) if self.max_bytes else budget
+        survivors = sorted(self.entries.items(), key=lambda item: (item[1][1], item[1][0]), reverse=True)[:budget]
+
+        old = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(self.rows, self.dim))
+        tmp_path = f"{self._vectors_path}.tmp"
+        entries = {}
+        with open(tmp_path, "wb") as f:
+            for new_row, (key, (old_row, last_used)) in enumerate(survivors):
+                f.write(np.ascontiguousarray(old[int(old_row)]).tobytes())
+                entries[key] = [new_row, last_used]
+        del old
+
+        os.replace(tmp_path, self._vectors_path)
+        evicted = len(self.entries) - len(entries)
+        self.entries = entries
+        self.rows = len(entries)
+        self._save_index()
+        logger.info(f"Embedding cache GC evicted {evicted} vectors, {self.rows} remain ({self.size_bytes} bytes).")
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    LangChain Embeddings wrapper that serves document vectors from an EmbeddingCache
+    and only instantiates the underlying model when there are misses.
+    Attributes:
+        cache (EmbeddingCache): Cache to consult and fill.
+        hits (int): Texts served from the cache so far.
+        misses (int): Texts that had to be encoded by the model.
+    """
+
+    def __init__(
+        self,
+        cache: EmbeddingCache,
+        embeddings_factory: Callable[[], Embeddings],
+        batch_size: int = 256,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ):
+        self.cache = cache
+        self._factory = embeddings_factory
+        self._embeddings: Optional[Embeddings] = None
+        self.batch_size = batch_size
+        self.progress_callback = progress_callback
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def embeddings(self) -> Embeddings:
+        if self._embeddings is None:
+            logger.info(f"Loading embedding model: {self.cache.model_name}")
+            self._embeddings = self._factory()
+        return self._embeddings
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        cached = self.cache.get_many(texts)
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, cached) if vector is None))
+        self.hits += len(texts) - sum(vector is None for vector in cached)
+        self.misses += len(missing)
+        logger.info(f"Embedding cache: {len(texts) - len(missing)} hits, {len(missing)} texts to encode.")
+
+        done = len(texts) - len(missing)
+        if self.progress_callback:
+            self.progress_callback(done, len(texts))
+
+        computed: Dict[str, np.ndarray] = {}
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start:start + self.batch_size]
+            vectors = np.asarray(self.embeddings.embed_documents(batch), dtype=np.float32)
+            self.cache.put_many(batch, vectors)
+            computed.update(zip(batch, vectors))
+            done += len(batch)
+            if self.progress_callback:
+                self.progress_callback(done, len(texts))
+
+        if not missing:
+            self.cache.touch()
+
+        return [
+            (vector if vector is not None else computed[text]).tolist()
+            for text, vector in zip(texts, cached)
+        ]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
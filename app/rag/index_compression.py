@@ -0,0 +1,389 @@
+"""
+index_compression.py
+
+Builds FAISS indexes with reduced vector storage precision and serves them
+with full-precision re-scoring.
+
+Supported storage modes are float32 (exact), float16, scalar-quantized int8
+and product quantization, optionally preceded by a PCA projection. When a
+compressed mode is used, the original float32 vectors are written next to the
+index and memory-mapped at load time, so the top candidates returned by the
+compressed index can be re-ranked exactly without keeping full vectors in RAM.
+"""
+
+import json
+import os
+import pickle
+from typing import Any, Dict, List, Optional, Tuple
+
+import faiss
+import numpy as np
+from langchain.schema import Document
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+
+from app.utils.logger_utils import get_logger
+
+logger = get_logger("IndexCompression")
+
+PRECISIONS = ("float32", "float16", "int8", "pq")
+FULL_VECTORS_FILE = "vectors_f32.npy"
+META_FILE = "index_meta.json"
+
+
+def _pq_subquantizers(dim: int, requested: int) -> int:
+    """Returns the requested PQ sub-quantizer count, or the largest divisor of dim giving >= 8 dims each."""
+    if requested:
+        if dim % requested:
+            raise ValueError(f"INDEX_PQ_M={requested} must divide the vector dimension {dim}.")
+        return requested
+    for m in range(max(1, dim // 8), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def index_factory_string(dim: int, precision: str, pca_dim: int = 0, pq_m: int = 0) -> str:
+    """
+    Translates storage settings into a FAISS index_factory description.
+    Args:
+        dim (int): Dimension of the stored (post-PCA) vectors.
+        precision (str): One of PRECISIONS.
+        pca_dim (int): Target PCA dimension, 0 to disable.
+        pq_m (int): PQ sub-quantizers, 0 for automatic.
+    Returns: str: e.g. "PCA128,SQ8" or "PQ48".
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown index precision '{precision}', expected one of {PRECISIONS}.")
+
+    if precision == "pq":
+        storage = f"PQ{_pq_subquantizers(dim, pq_m)}"
+    else:
+        storage = {"float32": "Flat", "float16": "SQfp16", "int8": "SQ8"}[precision]
+    return f"PCA{pca_dim},{storage}" if pca_dim else storage
+
+
+def build_index(
+    vectors: np.ndarray,
+    precision: str = "float32",
+    pca_dim: int = 0,
+    pq_m: int = 0
+) -> Tuple[faiss.Index, str, str, int]:
+    """
+    Trains and fills a FAISS index for the given vectors, falling back to a
+    cheaper configuration when there are too few vectors to train on.
+    Args:
+        vectors (np.ndarray): float32 matrix of shape (n, dim).
+        precision (str): One of PRECISIONS.
+        pca_dim (int): Target PCA dimension, 0 to disable.
+        pq_m (int): PQ sub-quantizers, 0 for automatic.
+    Returns: Tuple[faiss.Index, str, str, int]: The populated index, and the factory string,
+             precision and PCA dimension actually used.
+    """
+    n, dim = vectors.shape
+
+    if pca_dim and (pca_dim >= dim or n < pca_dim):
+        logger.warning(f"Skipping PCA to {pca_dim} dims (input dim {dim}, {n} vectors).")
+        pca_dim = 0
+
+    # 8-bit PQ codebooks need at least 256 training points per sub-quantizer.
+    if precision == "pq" and n < 256:
+        logger.warning(f"Only {n} vectors, too few to train PQ; using int8 scalar quantization instead.")
+        precision = "int8"
+
+    description = index_factory_string(pca_dim or dim, precision, pca_dim, pq_m)
+    index = faiss.index_factory(dim, description)
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    return index, description, precision, pca_dim
+
+
+def code_size(index: faiss.Index) -> int:
+    """Bytes stored per vector by the index."""
+    try:
+        return int(index.sa_code_size())
+    except RuntimeError:
+        return int(faiss.serialize_index(index).size // max(index.ntotal, 1))
+
+
+def measure_recall(
+    index: faiss.Index,
+    vectors: np.ndarray,
+    k: int,
+    rerank_factor: int = 1,
+    sample_size: int = 256,
+    seed: int = 0
+) -> float:
+    """
+    Estimates recall@k of a (compressed) index against exact search, using a
+    sample of the indexed vectors as queries. Each query's own vector is removed
+    from both result lists, so trivially finding itself does not count as recall.
+    Args:
+        index (faiss.Index): Index under test.
+        vectors (np.ndarray): The float32 vectors that were indexed.
+        k (int): Neighbours per query.
+        rerank_factor (int): If > 1, fetch k * rerank_factor candidates and re-score them exactly.
+        sample_size (int): Number of queries.
+    Returns: float: Fraction of true top-k neighbours found.
+    """
+    n = vectors.shape[0]
+    k = min(k, n - 1)
+    if k <= 0:
+        return 1.0
+    rng = np.random.RandomState(seed)
+    query_ids = rng.choice(n, size=min(sample_size, n), replace=False)
+    queries = vectors[query_ids]
+
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, k + 1)
+    truth = np.stack([row[row != qid][:k] for qid, row in zip(query_ids, truth)])
+
+    fetch = min(k * max(rerank_factor, 1) + 1, n)
+    _, found = index.search(queries, fetch)
+    found = [row[row != qid] for qid, row in zip(query_ids, found)]
+    if rerank_factor > 1:
+        found = [rescore(vectors, q, row, k)[0] for q, row in zip(queries, found)]
+    else:
+        found = [row[:k] for row in found]
+
+    hits = sum(len(set(t) & set(f)) for t, f in zip(truth, found))
+    return hits / float(truth.size)
+
+
+def rescore(full_vectors: np.ndarray, query: np.ndarray, positions: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Re-ranks candidate positions by exact squared L2 distance.
+    Returns: Tuple[np.ndarray, np.ndarray]: Top-k positions and their distances.
+    """
+    # Sorted positions turn the memory-mapped reads into a forward scan.
+    positions = np.sort(positions[positions != -1])
+    distances = ((np.asarray(full_vectors[positions]) - query) ** 2).sum(axis=1)
+    order = np.argsort(distances, kind="stable")[:k]
+    if len(order) < k:
+        pad = k - len(order)
+        return (np.concatenate([positions[order], np.full(pad, -1, dtype=positions.dtype)]),
+                np.concatenate([distances[order], np.full(pad, np.inf, dtype=distances.dtype)]))
+    return positions[order], distances[order]
+
+
+class RescoringFAISS(FAISS):
+    """
+    LangChain FAISS store that over-fetches from a compressed index and
+    re-ranks the candidates against memory-mapped float32 vectors.
+    Attributes:
+        full_vectors (np.ndarray, optional): Full-precision vectors by index position; None disables re-scoring.
+        rerank_factor (int): Candidates fetched per requested result.
+    """
+
+    def __init__(self, *args: Any, full_vectors: Optional[np.ndarray] = None, rerank_factor: int = 4, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.full_vectors = full_vectors
+        self.rerank_factor = rerank_factor
+
+    def search_positions(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        fetch_k: int = 20
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Runs the vector search and returns index positions rather than documents.
+        Args:
+            embedding (List[float]): Query vector.
+            k (int): Results wanted.
+            filter (dict, optional): Metadata filter applied to candidates.
+            fetch_k (int): Candidates fetched before filtering.
+        Returns: Tuple[np.ndarray, np.ndarray]: Positions and L2 distances, best first.
+        """
+        vector = np.array([embedding], dtype=np.float32)
+        if self._normalize_L2:
+            faiss.normalize_L2(vector)
+
+        fetch = k if filter is None else fetch_k
+        if self.full_vectors is not None:
+            fetch *= self.rerank_factor
+            _, candidates = self.index.search(vector, fetch)
+            positions, scores = rescore(self.full_vectors, vector[0], candidates[0], fetch)
+        else:
+            scores, positions = self.index.search(vector, fetch)
+            positions, scores = positions[0], scores[0]
+
+        keep = positions != -1
+        positions, scores = positions[keep], scores[keep]
+        if filter is not None:
+            filter_func = self._create_filter_func(filter)
+            keep = np.array(
+                [filter_func(self.docstore.search(self.index_to_docstore_id[int(i)]).metadata) for i in positions],
+                dtype=bool,
+            )
+            positions, scores = positions[keep], scores[keep]
+        return positions[:k], scores[:k]
+
+    def documents_for_positions(self, positions: np.ndarray) -> List[Document]:
+        docs = []
+        for i in positions:
+            _id = self.index_to_docstore_id[int(i)]
+            doc = self.docstore.search(_id)
+            if not isinstance(doc, Document):
+                raise ValueError(f"Could not find document for id {_id}, got {doc}")
+            docs.append(doc)
+        return docs
+
+    def similarity_search_with_score_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        fetch_k: int = 20,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        if self.full_vectors is None or callable(filter):
+            return super().similarity_search_with_score_by_vector(embedding, k, filter=filter, fetch_k=fetch_k, **kwargs)
+
+        positions, scores = self.search_positions(embedding, k, filter=filter, fetch_k=fetch_k)
+        docs = list(zip(self.documents_for_positions(positions), (float(s) for s in scores)))
+
+        score_threshold = kwargs.get("score_threshold")
+        if score_threshold is not None:
+            docs = [(doc, score) for doc, score in docs if score <= score_threshold]
+        return docs
+
+
+def build_vector_store(
+    docs: List[Document],
+    vectors: np.ndarray,
+    embeddings: Any,
+    precision: str = "float32",
+    pca_dim: int = 0,
+    pq_m: int = 0,
+    rerank_factor: int = 4,
+    recall_k: int = 3
+) -> Tuple[RescoringFAISS, Dict[str, Any]]:
+    """
+    Builds a RescoringFAISS store with the requested storage precision and a
+    report of its memory footprint and recall cost.
+    Args:
+        docs (List[Document]): Chunks, aligned with vectors.
+        vectors (np.ndarray): float32 embeddings of shape (len(docs), dim).
+        embeddings: Embedding function used for queries.
+        precision (str): One of PRECISIONS.
+        pca_dim (int): Target PCA dimension, 0 to disable.
+        pq_m (int): PQ sub-quantizers, 0 for automatic.
+        rerank_factor (int): Candidates per result re-scored at full precision; <= 1 disables.
+        recall_k (int): k used for the recall estimate (usually settings.TOP_K).
+    Returns: Tuple[RescoringFAISS, Dict[str, Any]]: The store and its build report.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    index, description, built_precision, built_pca_dim = build_index(vectors, precision, pca_dim, pq_m)
+    compressed = description != "Flat"
+    rescoring = compressed and rerank_factor > 1
+
+    ids = [str(i) for i in range(len(docs))]
+    store = RescoringFAISS(
+        embeddings,
+        index,
+        InMemoryDocstore(dict(zip(ids, docs))),
+        dict(enumerate(ids)),
+        full_vectors=vectors if rescoring else None,
+        rerank_factor=rerank_factor,
+    )
+
+    bytes_per_vector = code_size(index)
+    report = {
+        "index_factory": description,
+        "precision": built_precision,
+        "requested_precision": precision,
+        "dim": int(vectors.shape[1]),
+        "pca_dim": int(built_pca_dim),
+        "requested_pca_dim": int(pca_dim),
+        "ntotal": int(index.ntotal),
+        "bytes_per_vector": bytes_per_vector,
+        "float32_bytes_per_vector": int(vectors.shape[1] * 4),
+        "mb_per_million_vectors": round(bytes_per_vector * 1e6 / 2 ** 20, 1),
+        "rescoring": rescoring,
+        "rerank_factor": int(rerank_factor) if rescoring else 1,
+        "recall_k": int(recall_k),
+        "recall": 1.0,
+        "recall_rescored": None,
+    }
+    if compressed:
+        report["recall"] = round(measure_recall(index, vectors, recall_k), 4)
+        if rescoring:
+            report["recall_rescored"] = round(measure_recall(index, vectors, recall_k, rerank_factor), 4)
+
+    logger.info(
+        f"Built {description} index: {report['ntotal']} vectors, {bytes_per_vector} B/vector "
+        f"({report['mb_per_million_vectors']} MB per million), recall@{recall_k}={report['recall']}"
+        + (f", re-scored={report['recall_rescored']}" if rescoring else "")
+    )
+    return store, report
+
+
+def save_vector_store(store: RescoringFAISS, index_path: str, report: Dict[str, Any]) -> None:
+    """Saves the FAISS index and docstore, plus full vectors (if re-scoring) and the build report."""
+    os.makedirs(index_path, exist_ok=True)
+    store.save_local(index_path)
+
+    full_vectors_path = os.path.join(index_path, FULL_VECTORS_FILE)
+    if store.full_vectors is not None:
+        np.save(full_vectors_path, np.asarray(store.full_vectors, dtype=np.float32))
+    elif os.path.exists(full_vectors_path):
+        os.remove(full_vectors_path)
+
+    with open(os.path.join(index_path, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+
+def load_vector_store(
+    index_path: str,
+    embeddings: Any,
+    allow_dangerous_deserialization: bool = True,
+    mmap: bool = False
+) -> RescoringFAISS:
+    """
+    Loads an index saved by save_vector_store (or a plain FAISS.save_local index).
+    Full-precision vectors are memory-mapped read-only, so they live in the
+    shared page cache rather than in each process's heap. With mmap=True the
+    FAISS index is opened with the mmap flags, but only faiss builds that have
+    IO_FLAG_MMAP_IFC map Flat/SQ/PQ codes; older ones, including the pinned
+    1.7.4, still read them into memory. The docstore is always unpickled into
+    each process. Only use mmap for files that are never rewritten in place.
+    """
+    meta: Dict[str, Any] = {}
+    meta_path = os.path.join(index_path, META_FILE)
+    if os.path.exists(meta_path):
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+    full_vectors = None
+    full_vectors_path = os.path.join(index_path, FULL_VECTORS_FILE)
+    if meta.get("rescoring") and os.path.exists(full_vectors_path):
+        full_vectors = np.load(full_vectors_path, mmap_mode="r")
+
+    if not mmap:
+        return RescoringFAISS.load_local(
+            index_path,
+            embeddings,
+            allow_dangerous_deserialization=allow_dangerous_deserialization,
+            full_vectors=full_vectors,
+            rerank_factor=meta.get("rerank_factor", 1),
+        )
+
+    # Same files as FAISS.load_local, read with mmap flags it does not expose.
+    if not allow_dangerous_deserialization:
+        raise ValueError("Loading the docstore unpickles index.pkl; set allow_dangerous_deserialization=True for trusted indexes.")
+    flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY | getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+    index = faiss.read_index(os.path.join(index_path, "index.faiss"), flags)
+    with open(os.path.join(index_path, "index.pkl"), "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+    return RescoringFAISS(
+        embeddings,
+        index,
+        docstore,
+        index_to_docstore_id,
+        full_vectors=full_vectors,
+        rerank_factor=meta.get("rerank_factor", 1),
+    )
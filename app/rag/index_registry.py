@@ -0,0 +1,94 @@
+"""
+index_registry.py
+
+Tracks versions of the FAISS index on disk.
+
+Each build is written to its own folder under <FAISS_INDEX_PATH>/versions/
+and becomes live when the CURRENT pointer file is atomically replaced, so
+readers never observe a half-written index. An index saved directly in
+FAISS_INDEX_PATH (the layout used before versioning) is still served as
+long as no version has been published.
+"""
+
+import os
+import shutil
+import time
+import uuid
+from typing import Tuple
+
+from app.utils.logger_utils import get_logger
+
+logger = get_logger("IndexRegistry")
+
+VERSIONS_DIR = "versions"
+CURRENT_FILE = "CURRENT"
+LEGACY_INDEX_FILE = "index.faiss"
+
+
+def _current_file(index_root: str) -> str:
+    return os.path.join(index_root, CURRENT_FILE)
+
+
+def new_version(index_root: str) -> Tuple[str, str]:
+    """
+    Reserves a folder for a new index build.
+    Args: index_root (str): Root index folder (settings.FAISS_INDEX_PATH).
+    Returns: Tuple[str, str]: Version name and the folder to save the index into.
+    """
+    version = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    path = os.path.join(index_root, VERSIONS_DIR, version)
+    os.makedirs(path, exist_ok=True)
+    return version, path
+
+
+def publish_version(index_root: str, version: str) -> None:
+    """Atomically makes the given version the live index."""
+    path = os.path.join(index_root, VERSIONS_DIR, version)
+    if not os.path.isdir(path):
+        raise FileNotFoundError(f"Index version not found: {path}")
+
+    tmp_path = f"{_current_file(index_root)}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp_path, _current_file(index_root))
+    logger.info(f"Published index version {version}")
+
+
+def current_index(index_root: str) -> Tuple[str, str]:
+    """
+    Resolves the live index.
+    Args: index_root (str): Root index folder (settings.FAISS_INDEX_PATH).
+    Returns: Tuple[str, str]: Version name and the folder holding that index.
+             For an unversioned index the version is derived from its modification time.
+    """
+    try:
+        with open(_current_file(index_root), "r", encoding="utf-8") as f:
+            version = f.read().strip()
+        return version, os.path.join(index_root, VERSIONS_DIR, version)
+    except FileNotFoundError:
+        pass
+
+    try:
+        mtime = os.stat(os.path.join(index_root, LEGACY_INDEX_FILE)).st_mtime_ns
+    except FileNotFoundError:
+        mtime = 0
+    return f"legacy-{mtime}", index_root
+
+
+def prune_versions(index_root: str, keep: int) -> None:
+    """
+    Deletes all but the newest `keep` versions, never touching the live one.
+    Processes still serving a deleted version keep working: their index is in
+    memory and memory-mapped files stay valid until unmapped.
+    """
+    versions_root = os.path.join(index_root, VERSIONS_DIR)
+    if keep <= 0 or not os.path.isdir(versions_root):
+        return
+
+    live, _ = current_index(index_root)
+    versions = sorted(os.listdir(versions_root), reverse=True)
+    for version in versions[keep:]:
+        if version == live:
+            continue
+        shutil.rmtree(os.path.join(versions_root, version), ignore_errors=True)
+        logger.info(f"Pruned index version {version}")
@@ -0,0 +1,304 @@
+"""
+ingestion_jobs.py
+
+Background ingestion jobs for the API.
+
+Jobs run in a small pool of separate, niced worker processes with capped
+CPU threads, so embedding a corpus does not compete with request-serving
+threads for the GIL or for cores. Workers stream progress back over a queue;
+job status is written to one JSON file per job under INGEST_JOBS_PATH, so any
+API worker process can answer a status request, and only the newest
+INGEST_MAX_STORED_JOBS files are kept. A finished job publishes a new index
+version that RAGService picks up on its next reload check.
+
+Each API process owns its pool of INGEST_MAX_WORKERS workers, so a gunicorn
+deployment can start that many per API worker. INGEST_NODE_MAX_JOBS caps how
+many jobs actually build at once on the node: a job holds an flock'ed slot
+file under INGEST_JOBS_PATH while it runs and waits for a free one otherwise.
+"""
+
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from app.config.settings import get_settings
+from app.utils.logger_utils import get_logger
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+logger = get_logger("IngestionJobs")
+settings = get_settings()
+
+# Set inside ingestion worker processes by _init_worker.
+_progress_queue = None
+
+SLOTS_DIR = "slots"
+SLOT_POLL_SECONDS = 1.0
+
+
+def _init_worker(progress_queue, threads: int, niceness: int) -> None:
+    """Caps threads and lowers priority before any numeric library is imported."""
+    global _progress_queue
+    _progress_queue = progress_queue
+
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+    if niceness and hasattr(os, "nice"):
+        os.nice(niceness)
+
+    import torch
+    torch.set_num_threads(threads)
+
+
+@contextmanager
+def _node_slot(jobs_path: str, slots: int, on_wait):
+    """
+    Holds one of `slots` lock files under jobs_path for the duration of a job,
+    calling on_wait() once if every slot is taken. Locks are released by the OS
+    if the worker dies, so a crashed job never leaks its slot.
+    """
+    if not fcntl or slots <= 0:
+        yield
+        return
+
+    slots_dir = os.path.join(jobs_path, SLOTS_DIR)
+    os.makedirs(slots_dir, exist_ok=True)
+    waiting = False
+    while True:
+        for slot in range(slots):
+            lock_file = open(os.path.join(slots_dir, f"{slot}.lock"), "a")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                continue
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+                lock_file.close()
+            return
+
+        if not waiting:
+            on_wait()
+            waiting = True
+        time.sleep(SLOT_POLL_SECONDS)
+
+
+def _run_ingestion(job_id: str, pdf_folder: str, index_root: str, jobs_path: str, node_slots: int) -> Dict[str, Any]:
+    from app.rag.embedder import embed_and_publish
+
+    def progress(stage: str, done: int, total: int, cache_hits: int = 0) -> None:
+        _progress_queue.put((job_id, {"stage": stage, "chunks_done": done, "chunks_total": total, "cache_hits": cache_hits}))
+
+    with _node_slot(jobs_path, node_slots, lambda: progress("waiting", 0, 0)):
+        result = embed_and_publish(pdf_folder=pdf_folder, index_root=index_root, progress_callback=progress)
+    if result is None:
+        raise ValueError(f"No documents found to index in {pdf_folder}")
+
+    version, report = result
+    return {"index_version": version, "report": report}
+
+
+class IngestionJobManager:
+    """
+    Queues ingestion jobs onto a process pool and tracks their progress.
+    The pool is created on first use, so it is never forked from a preloaded gunicorn master,
+    and is replaced if a worker dies and leaves it broken.
+    """
+
+    def __init__(
+        self,
+        jobs_path: str = settings.INGEST_JOBS_PATH,
+        index_root: str = settings.FAISS_INDEX_PATH,
+        max_workers: int = settings.INGEST_MAX_WORKERS,
+        node_slots: int = settings.INGEST_NODE_MAX_JOBS,
+        threads: int = settings.INGEST_THREADS,
+        niceness: int = settings.INGEST_NICE,
+        max_stored_jobs: int = settings.INGEST_MAX_STORED_JOBS
+    ):
+        self.jobs_path = jobs_path
+        self.index_root = index_root
+        self.max_workers = max_workers
+        self.node_slots = node_slots
+        self.threads = threads
+        self.niceness = niceness
+        self.max_stored_jobs = max_stored_jobs
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._progress_queue = None
+
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                context = multiprocessing.get_context("spawn")
+                self._progress_queue = context.Queue()
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=context,
+                    initializer=_init_worker,
+                    initargs=(self._progress_queue, self.threads, self.niceness)
+                )
+                threading.Thread(
+                    target=self._drain_progress, args=(self._progress_queue,), name="ingest-progress", daemon=True
+                ).start()
+            return self._executor
+
+    def _reset_pool(self, broken: ProcessPoolExecutor) -> None:
+        """Drops a broken pool and stops its progress thread; the next _ensure_pool starts fresh."""
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self._executor = None
+            self._progress_queue.put(None)
+            self._progress_queue = None
+        broken.shutdown(wait=False)
+        logger.warning("Ingestion worker pool was broken; starting a new one.")
+
+    def submit(self, pdf_folder: str) -> Dict[str, Any]:
+        """
+        Queues an ingestion of every PDF in pdf_folder.
+        Args: pdf_folder (str): Folder to ingest.
+        Returns: Dict[str, Any]: Initial job status.
+        """
+        executor = self._ensure_pool()
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "stage": None,
+            "pdf_folder": pdf_folder,
+            "chunks_done": 0,
+            "chunks_total": 0,
+            "cache_hits": 0,
+            "progress": 0.0,
+            "chunks_per_second": None,
+            "index_version": None,
+            "report": None,
+            "error": None,
+            "created_at": time.time(),
+            "started_at": None,
+            "embedding_started_at": None,
+            "finished_at": None,
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._save(job)
+            self._trim()
+
+        args = (_run_ingestion, job_id, pdf_folder, self.index_root, self.jobs_path, self.node_slots)
+        try:
+            future = executor.submit(*args)
+        except BrokenProcessPool:
+            self._reset_pool(executor)
+            future = self._ensure_pool().submit(*args)
+        future.add_done_callback(lambda f: self._finish(job_id, f))
+        logger.info(f"Queued ingestion job {job_id} for {pdf_folder}")
+        return dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Returns the latest status of a job, including jobs started by other API processes."""
+        with self._lock:
+            if job_id in self._jobs:
+                return dict(self._jobs[job_id])
+
+        path = self._job_file(job_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _drain_progress(self, progress_queue) -> None:
+        while True:
+            message = progress_queue.get()
+            if message is None:
+                return
+            job_id, update = message
+            now = time.time()
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None or job["status"] in ("succeeded", "failed"):
+                    continue
+                job["status"] = "running"
+                job["started_at"] = job["started_at"] or now
+                if update["stage"] != "embedding":
+                    # Keep the embedding-stage hit count once later stages report 0.
+                    update = dict(update, cache_hits=job["cache_hits"])
+                job.update(update)
+
+                if update["stage"] == "embedding":
+                    job["embedding_started_at"] = job["embedding_started_at"] or now
+                    elapsed = now - job["embedding_started_at"]
+                    if elapsed > 0:
+                        # Cache hits cost no encoding, so only encoded chunks count toward throughput.
+                        encoded = update["chunks_done"] - update["cache_hits"]
+                        job["chunks_per_second"] = round(encoded / elapsed, 2)
+                if update["chunks_total"]:
+                    job["progress"] = round(update["chunks_done"] / update["chunks_total"], 4)
+                self._save(job)
+
+    def _finish(self, job_id: str, future: Future) -> None:
+        with self._lock:
+            job = self._jobs[job_id]
+            job["finished_at"] = time.time()
+            error = future.exception()
+            if error is not None:
+                job["status"] = "failed"
+                job["error"] = str(error)
+                logger.error(f"Ingestion job {job_id} failed: {error}")
+            else:
+                result = future.result()
+                job["status"] = "succeeded"
+                job["stage"] = "done"
+                job["progress"] = 1.0
+                job["index_version"] = result["index_version"]
+                job["report"] = result["report"]
+                logger.info(f"Ingestion job {job_id} published index version {result['index_version']}")
+            self._save(job)
+            # Finished jobs are served from their status file, like jobs of other processes.
+            del self._jobs[job_id]
+
+    def _job_file(self, job_id: str) -> str:
+        return os.path.join(self.jobs_path, f"{os.path.basename(job_id)}.json")
+
+    def _trim(self) -> None:
+        """Deletes the oldest status files beyond max_stored_jobs, sparing jobs still tracked here."""
+        if self.max_stored_jobs <= 0:
+            return
+        files = []
+        for entry in os.scandir(self.jobs_path):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                files.append((entry.stat().st_mtime, entry))
+            except FileNotFoundError:  # trimmed concurrently by another API process
+                continue
+        files.sort(key=lambda item: item[0], reverse=True)
+        for _, entry in files[self.max_stored_jobs:]:
+            if entry.name[:-len(".json")] in self._jobs:
+                continue
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+    def _save(self, job: Dict[str, Any]) -> None:
+        os.makedirs(self.jobs_path, exist_ok=True)
+        path = self._job_file(job["job_id"])
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(job, f)
+        os.replace(tmp_path, path)
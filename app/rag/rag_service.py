@@ -1,14 +1,17 @@
 import re
+import threading
 import time
 from typing import Optional, Dict, List, Union
 
-from langchain.vectorstores import FAISS
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain.chains import RetrievalQA
 from langchain.schema import Document
 from langchain.chat_models import ChatOpenAI
 
 from app.config.settings import get_settings
+from app.rag.index_compression import load_vector_store
+from app.rag.index_registry import current_index
+from app.rag.retrieval_cache import CachedRetriever, RetrievalCache
 from app.utils.logger_utils import get_logger
 
 logger = get_logger("RAGService")
@@ -28,7 +31,7 @@ class RAGService:
         Initialize RAGService and its chain using FAISS + OpenAI.
 
         Args:
-            index_path (str): Path to FAISS index.
+            index_path (str): Root FAISS index folder; the published version inside it is served.
             embedding_model (str): Embedding model (HuggingFace).
             model_name (str): OpenAI model like gpt-3.5-turbo.
             k (int): Top-K retrieval.
@@ -39,7 +42,19 @@ class RAGService:
         self.model_name = model_name
         self.k = k
         self.llm = llm
-        self.chain = self._build_rag_chain()
+        self.embeddings: Optional[HuggingFaceEmbeddings] = None
+        self.index_version: Optional[str] = None
+        self._last_version_check = time.monotonic()
+        # Started lazily, so nothing is running when a preloaded gunicorn master forks.
+        self._reload_thread: Optional[threading.Thread] = None
+        self.retrieval_cache = RetrievalCache(
+            max_entries=settings.RETRIEVAL_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.RETRIEVAL_CACHE_TTL_SECONDS,
+            shared_path=settings.RETRIEVAL_CACHE_SHARED_PATH or None
+        ) if settings.RETRIEVAL_CACHE_ENABLED else None
+        version, path = current_index(self.index_path)
+        self.chain = self._build_rag_chain(version, path)
+        self.index_version = version
 
     @classmethod
     def from_config(cls, config: Dict):
@@ -50,17 +65,22 @@ class RAGService:
             k=config.get("top_k", settings.TOP_K),
         )
 
-    def _build_rag_chain(self) -> RetrievalQA:
+    def _build_rag_chain(self, version: str, path: str) -> RetrievalQA:
         try:
             logger.info("Initializing RAG chain...")
-            logger.info(f"Embedding model: {self.embedding_model}")
-            embeddings = HuggingFaceEmbeddings(model_name=self.embedding_model)
-
-            logger.info(f"Loading FAISS index from: {self.index_path}")
-            db = FAISS.load_local(
-                self.index_path,
-                embeddings,
-                allow_dangerous_deserialization=True
+            if self.embeddings is None:
+                logger.info(f"Embedding model: {self.embedding_model}")
+                self.embeddings = HuggingFaceEmbeddings(model_name=self.embedding_model)
+
+            logger.info(f"Loading FAISS index version {version} from: {path}")
+            # Published versions are immutable, so their index may be memory-mapped where
+            # faiss supports it; the legacy layout is rewritten in place and is read fully.
+            # Either way a reload gives this worker a private copy of the docstore.
+            db = load_vector_store(
+                path,
+                self.embeddings,
+                allow_dangerous_deserialization=True,
+                mmap=not version.startswith("legacy-")
             )
 
             if not self.llm:
@@ -71,7 +91,15 @@ class RAGService:
                     openai_api_key=settings.OPENAI_API_KEY
                 )
 
-            retriever = db.as_retriever(search_kwargs={"k": self.k})
+            if self.retrieval_cache is not None:
+                retriever = CachedRetriever(
+                    vectorstore=db,
+                    cache=self.retrieval_cache,
+                    index_version=version,
+                    k=self.k
+                )
+            else:
+                retriever = db.as_retriever(search_kwargs={"k": self.k})
 
             chain = RetrievalQA.from_chain_type(
                 llm=self.llm,
@@ -87,19 +115,61 @@ class RAGService:
             logger.exception("Failed to initialize RAG chain.")
             raise RuntimeError("RAG chain initialization failed") from e
 
+    def reload_if_stale(self) -> bool:
+        """
+        Starts loading a newly published index version in a background thread,
+        checking at most every settings.INDEX_RELOAD_CHECK_SECONDS. Queries keep
+        using the current chain until the new one is swapped in; on failure the
+        current chain keeps serving. Every API worker runs its own check and
+        loads a private copy, so memory shared by a preloaded master is lost after a reload.
+        Returns: bool: True if a reload was started.
+        """
+        now = time.monotonic()
+        if now - self._last_version_check < settings.INDEX_RELOAD_CHECK_SECONDS:
+            return False
+        self._last_version_check = now
+
+        if self._reload_thread is not None and self._reload_thread.is_alive():
+            return False
+
+        version, path = current_index(self.index_path)
+        if version == self.index_version:
+            return False
+
+        self._reload_thread = threading.Thread(
+            target=self._reload, args=(version, path), name="index-reload", daemon=True
+        )
+        self._reload_thread.start()
+        return True
+
+    def _reload(self, version: str, path: str) -> None:
+        previous = self.index_version
+        try:
+            chain = self._build_rag_chain(version, path)
+        except RuntimeError:
+            logger.exception(f"Failed to load index version {version}; still serving {previous}.")
+            return
+
+        self.chain = chain
+        self.index_version = version
+        if self.retrieval_cache is not None:
+            self.retrieval_cache.invalidate(keep_version=version)
+        logger.info(f"Switched RAG index from version {previous} to {version}.")
+
     def query(self, question: str) -> Dict[str, Optional[Union[str, List[Dict]]]]:
         try:
+            self.reload_if_stale()
             logger.info(f"RAG received question: {question}")
             start_time = time.time()
 
             response = self.chain({"query": question})
             logger.info(f"Raw chain response: {response}")
 
-            retrieved_docs = self.chain.retriever.get_relevant_documents(question)
+            retrieved_docs = response.get("source_documents", [])
             logger.info(f"Top FAISS chunks: {[doc.page_content[:200] for doc in retrieved_docs]}")
 
             result_text = self._clean_text(response.get("result", ""))
-            source_docs = self._format_source_documents(response.get("source_documents", []))
+            source_docs = self._format_source_documents(retrieved_docs)
 
             return {
                 "result": result_text,
@@ -115,12 +185,13 @@ class RAGService:
                 "error": str(e)
             }
 
-    def _format_source_documents(self, docs: List[Document]) -> List[Dict[str, str]]:
+    def _format_source_documents(self, docs: List[Document]) -> List[Dict]:
         return [
             {
                 "source": doc.metadata.get("filename", "unknown"),
                 "page": doc.metadata.get("page_number", "n/a"),
-                "snippet": self._clean_text(doc.page_content[:300])
+                "snippet": self._clean_text(doc.page_content[:300]),
+                "duplicate_sources": doc.metadata.get("sources", [])
             }
             for doc in docs
         ]
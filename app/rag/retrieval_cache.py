@@ -0,0 +1,215 @@
+"""
+retrieval_cache.py
+
+Caches the deterministic half of a RAG query: query embedding, FAISS search
+and candidate selection. Entries hold only index positions and distances and
+are keyed by index version, normalized query text, k and metadata filter, so
+publishing a new index version invalidates them automatically.
+
+Each process keeps a bounded LRU with a TTL; an optional SQLite file lets all
+API workers on a node share results.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain.schema import Document
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
+
+from app.utils.logger_utils import get_logger
+
+logger = get_logger("RetrievalCache")
+
+CacheEntry = Tuple[np.ndarray, np.ndarray]
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", query).casefold().split())
+
+
+class RetrievalCache:
+    """
+    Bounded LRU/TTL cache of retrieval results with optional SQLite sharing.
+    Attributes:
+        max_entries (int): Entries kept in the in-process LRU (and the shared store).
+        ttl_seconds (float): Lifetime of an entry; 0 disables expiry.
+        shared_path (str, optional): SQLite file shared by all local workers.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600, shared_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.shared_path = shared_path
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, np.ndarray, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._puts = 0
+
+        if shared_path:
+            os.makedirs(os.path.dirname(shared_path) or ".", exist_ok=True)
+            # Not cached: this instance is usually built in a preloaded gunicorn master,
+            # and SQLite connections must not be carried across fork().
+            conn = self._connect()
+            try:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS retrieval_cache ("
+                    "key TEXT PRIMARY KEY, version TEXT, positions BLOB, scores BLOB, expires_at REAL)"
+                )
+            finally:
+                conn.close()
+
+    @staticmethod
+    def make_key(index_version: str, query: str, k: int, search_filter: Optional[Dict[str, Any]] = None) -> str:
+        payload = json.dumps([index_version, normalize_query(query), k, search_filter], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.shared_path, timeout=1.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _connection(self) -> sqlite3.Connection:
+        """Per-thread connection, reopened in a forked child instead of reusing the parent's."""
+        pid = os.getpid()
+        if getattr(self._local, "pid", None) != pid:
+            self._local.conn = self._connect()
+            self._local.pid = pid
+        return self._local.conn
+
+    def _expiry(self) -> float:
+        return time.time() + self.ttl_seconds if self.ttl_seconds else float("inf")
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """
+        Looks up a cached result.
+        Args: key (str): Key from make_key.
+        Returns: Optional[Tuple[np.ndarray, np.ndarray]]: Positions and scores, or None on a miss.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1], entry[2]
+                del self._entries[key]
+
+        if self.shared_path:
+            try:
+                row = self._connection().execute(
+                    "SELECT positions, scores, expires_at FROM retrieval_cache WHERE key = ? AND expires_at > ?",
+                    (key, now)
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"Shared retrieval cache read failed: {e}")
+                row = None
+            if row is not None:
+                positions = np.frombuffer(row[0], dtype=np.int64)
+                scores = np.frombuffer(row[1], dtype=np.float32)
+                self._put_local(key, positions, scores, row[2])
+                with self._lock:
+                    self.hits += 1
+                return positions, scores
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, index_version: str, positions: np.ndarray, scores: np.ndarray) -> None:
+        """Stores a result locally and, if configured, in the shared store."""
+        positions = np.ascontiguousarray(positions, dtype=np.int64)
+        scores = np.ascontiguousarray(scores, dtype=np.float32)
+        expires_at = self._expiry()
+        self._put_local(key, positions, scores, expires_at)
+
+        if not self.shared_path:
+            return
+        try:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO retrieval_cache VALUES (?, ?, ?, ?, ?)",
+                (key, index_version, positions.tobytes(), scores.tobytes(), expires_at)
+            )
+            self._puts += 1
+            if self._puts % 100 == 0:
+                self._trim_shared(conn)
+        except sqlite3.Error as e:
+            logger.warning(f"Shared retrieval cache write failed: {e}")
+
+    def _put_local(self, key: str, positions: np.ndarray, scores: np.ndarray, expires_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (expires_at, positions, scores)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _trim_shared(self, conn: sqlite3.Connection) -> None:
+        conn.execute("DELETE FROM retrieval_cache WHERE expires_at <= ?", (time.time(),))
+        conn.execute(
+            "DELETE FROM retrieval_cache WHERE key NOT IN "
+            "(SELECT key FROM retrieval_cache ORDER BY expires_at DESC LIMIT ?)",
+            (self.max_entries,)
+        )
+
+    def invalidate(self, keep_version: Optional[str] = None) -> None:
+        """
+        Drops cached results. Stale versions can never be hit since the version is
+        part of the key; this only reclaims the space they occupy.
+        Args: keep_version (str, optional): Shared-store rows of this version are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+
+        if not self.shared_path:
+            return
+        try:
+            self._connection().execute(
+                "DELETE FROM retrieval_cache WHERE version IS NOT ?", (keep_version,)
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Shared retrieval cache invalidation failed: {e}")
+
+
+class CachedRetriever(BaseRetriever):
+    """
+    Retriever over a RescoringFAISS store that serves repeated queries from a RetrievalCache.
+    Documents are re-read from the docstore on every call; only positions are cached.
+    """
+
+    vectorstore: Any
+    cache: RetrievalCache
+    index_version: str
+    k: int = 4
+    search_filter: Optional[Dict[str, Any]] = None
+    fetch_k: int = 20
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        key = self.cache.make_key(self.index_version, query, self.k, self.search_filter)
+        cached = self.cache.get(key)
+
+        if cached is None:
+            embedding = self.vectorstore._embed_query(query)
+            positions, scores = self.vectorstore.search_positions(
+                embedding, self.k, filter=self.search_filter, fetch_k=self.fetch_k
+            )
+            self.cache.put(key, self.index_version, positions, scores)
+        else:
+            positions, _ = cached
+
+        return self.vectorstore.documents_for_positions(positions)
@@ -5,13 +5,19 @@ import os
 sys.path.append(os.path.abspath("app"))
 
 from config.env_loader import load_env
-from rag.embedder import embed_and_store
+from rag.embedder import embed_and_publish
 
 load_env()
 
 if __name__ == "__main__":
-    path = embed_and_store()
-    if path:
-        print(f"FAISS index saved at: {path}")
+    try:
+        result = embed_and_publish()
+    except Exception as e:
+        result = None
+        print(f"Index build raised: {e}")
+
+    if result:
+        version, report = result
+        print(f"FAISS index version {version} published ({report['ntotal']} vectors).")
     else:
         print("Failed to build index.")
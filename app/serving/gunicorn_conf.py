@@ -0,0 +1,60 @@
+"""
+gunicorn_conf.py
+
+Gunicorn configuration for multi-worker serving with shared, read-only models.
+
+The app (BERT classifier, embedding model, FAISS index and docstore) is
+imported once in the master process and workers are forked from it, so the
+model weights and index pages are shared copy-on-write instead of loaded per
+worker. Run with:
+
+    gunicorn -c app/serving/gunicorn_conf.py app.main:app
+"""
+
+import gc
+import os
+
+from app.config.env_loader import load_env
+
+# Gunicorn reads this file before importing app.main, so the project-root .env
+# has to be loaded here for Settings to see the required secrets.
+load_env()
+
+from app.config.settings import get_settings
+from app.serving.memory import process_memory
+from app.utils.logger_utils import get_logger
+
+logger = get_logger("GunicornConf")
+settings = get_settings()
+
+bind = os.getenv("BIND", "0.0.0.0:8080")
+workers = settings.SERVING_WORKERS or (os.cpu_count() or 1)
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import the app (and load every model) in the master before forking.
+preload_app = True
+
+
+def when_ready(server):
+    """
+    Runs in the master after the app is loaded and before any worker is forked.
+    Moving every live object into the permanent GC generation stops the cyclic
+    collector in the workers from writing to their headers, which would otherwise
+    turn most of the shared heap into private copies.
+    """
+    gc.collect()
+    gc.freeze()
+    logger.info(f"Models loaded and heap frozen in master, forking {workers} workers. Memory: {process_memory()}")
+
+
+def post_fork(server, worker):
+    """
+    Splits the cores between workers so torch intra-op threads do not oversubscribe them.
+    Inference must not run in the master before fork, otherwise the OpenMP pool
+    inherited by the workers can deadlock.
+    """
+    import torch
+
+    threads = settings.SERVING_TORCH_THREADS or max(1, (os.cpu_count() or 1) // workers)
+    torch.set_num_threads(threads)
+    logger.info(f"Worker {worker.pid} started with {threads} torch threads.")
@@ -0,0 +1,39 @@
+"""
+memory.py
+
+Reports how much of this process's memory is shared with other workers.
+"""
+
+from typing import Dict
+
+SMAPS_ROLLUP = "/proc/self/smaps_rollup"
+FIELDS = {
+    "Rss": "rss_mb",
+    "Pss": "pss_mb",
+    "Shared_Clean": "shared_clean_mb",
+    "Shared_Dirty": "shared_dirty_mb",
+    "Private_Clean": "private_clean_mb",
+    "Private_Dirty": "private_dirty_mb",
+}
+
+
+def process_memory() -> Dict[str, float]:
+    """
+    Reads the memory rollup of the current process.
+    Returns: Dict[str, float]: Sizes in MB. 'private_dirty_mb' is roughly the cost
+             of one extra worker; 'pss_mb' is its fair share of shared pages.
+             Empty on platforms without /proc/self/smaps_rollup.
+    """
+    try:
+        with open(SMAPS_ROLLUP, "r") as f:
+            lines = f.readlines()
+    except OSError:
+        return {}
+
+    report = {}
+    for line in lines:
+        parts = line.split()
+        name = parts[0].rstrip(":")
+        if name in FIELDS:
+            report[FIELDS[name]] = round(int(parts[1]) / 1024, 1)
+    return report
@@ -0,0 +1,237 @@
+"""
+profiler.py
+
+Opt-in request profiling.
+
+A single background thread samples the Python stack of every thread that is
+currently serving a request, every PROFILE_INTERVAL_MS. The cost is paid per
+tick rather than per request and the thread sleeps while no request is in
+flight. When a request finishes, its samples are kept if it was randomly
+sampled (PROFILE_SAMPLE_RATE) or slower than PROFILE_SLOW_THRESHOLD_MS, and
+stored by trace ID as collapsed stacks (the format read by flamegraph.pl and
+speedscope). Everything else is discarded.
+
+Only the thread that entered the middleware is sampled, which is the event
+loop thread. That covers `async def` routes (/ask, /classify), which run
+their blocking work on the loop; overlapping requests there share samples,
+so profiles are most precise for requests that ran alone. Plain `def`
+routes (/ingest, /admin, /health) run in Starlette's threadpool, and their
+profiles only show the loop waiting for the response.
+"""
+
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+from uuid import uuid4
+
+from fastapi import Request
+
+from app.config.settings import get_settings
+from app.utils.logger_utils import get_logger
+
+logger = get_logger("Profiler")
+settings = get_settings()
+
+MAX_STACK_DEPTH = 128
+
+
+def _collapse(frame) -> str:
+    """Renders a frame and its callers as 'root;...;leaf'."""
+    parts = []
+    while frame is not None and len(parts) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+
+class _Session:
+    __slots__ = ("thread_id", "samples", "started")
+
+    def __init__(self, thread_id: int):
+        self.thread_id = thread_id
+        self.samples: Counter = Counter()
+        self.started = time.perf_counter()
+
+
+class StackSampler:
+    """
+    Wall-clock stack sampler for request-serving threads.
+    Attributes:
+        interval (float): Seconds between samples.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self._sessions: Dict[int, _Session] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start_session(self) -> _Session:
+        session = _Session(threading.get_ident())
+        with self._lock:
+            self._sessions[id(session)] = session
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return session
+
+    def stop_session(self, session: _Session) -> Counter:
+        with self._lock:
+            self._sessions.pop(id(session), None)
+        return session.samples
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while True:
+            with self._lock:
+                idle = not self._sessions
+                if idle:
+                    self._wake.clear()
+            if idle:
+                self._wake.wait()
+                continue
+
+            frames = sys._current_frames()
+            # Counting under the lock keeps stop_session from returning a counter still being written.
+            with self._lock:
+                stacks: Dict[int, str] = {}
+                for session in self._sessions.values():
+                    if session.thread_id == own_id or session.thread_id not in frames:
+                        continue
+                    if session.thread_id not in stacks:
+                        stacks[session.thread_id] = _collapse(frames[session.thread_id])
+                    session.samples[stacks[session.thread_id]] += 1
+            del frames
+
+            time.sleep(self.interval)
+
+
+class ProfileStore:
+    """
+    Bounded store of captured profiles, one JSON file per trace ID so that any
+    API worker can serve profiles captured by another.
+    Attributes:
+        path (str): Folder holding profile files.
+        max_profiles (int): Oldest profiles beyond this count are deleted.
+    """
+
+    def __init__(self, path: str, max_profiles: int = 200):
+        self.path = path
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+
+    def _file(self, trace_id: str) -> str:
+        # Trace IDs come from clients; hashing keeps distinct IDs in distinct, safe file names.
+        return os.path.join(self.path, f"{hashlib.sha256(trace_id.encode('utf-8')).hexdigest()}.json")
+
+    def save(self, profile: Dict) -> None:
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            path = self._file(profile["trace_id"])
+            tmp_path = f"{path}.{uuid4().hex}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(profile, f)
+            os.replace(tmp_path, path)
+            self._trim()
+
+    def _trim(self) -> None:
+        files = sorted(
+            (entry for entry in os.scandir(self.path) if entry.name.endswith(".json")),
+            key=lambda entry: entry.stat().st_mtime,
+            reverse=True
+        )
+        for entry in files[self.max_profiles:]:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+    def get(self, trace_id: str) -> Optional[Dict]:
+        try:
+            with open(self._file(trace_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def list(self) -> List[Dict]:
+        """Returns profile summaries (without stacks), newest first."""
+        if not os.path.isdir(self.path):
+            return []
+        summaries = []
+        for entry in os.scandir(self.path):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                with open(entry.path, "r", encoding="utf-8") as f:
+                    profile = json.load(f)
+            except (OSError, ValueError):
+                continue
+            profile.pop("stacks", None)
+            summaries.append(profile)
+        return sorted(summaries, key=lambda p: p["captured_at"], reverse=True)
+
+
+def to_collapsed(profile: Dict) -> str:
+    """Formats a stored profile as collapsed stacks, one 'stack count' per line."""
+    return "\n".join(f"{stack} {count}" for stack, count in profile["stacks"].items()) + "\n"
+
+
+sampler = StackSampler(interval=settings.PROFILE_INTERVAL_MS / 1000.0)
+profile_store = ProfileStore(settings.PROFILE_STORE_PATH, max_profiles=settings.PROFILE_MAX_STORED)
+
+
+async def profile_requests(request: Request, call_next):
+    """
+    HTTP middleware that samples each request and keeps the profile of sampled
+    or slow ones. Assigns an X-Trace-ID when the client did not send one so
+    the route, the logs and the stored profile share the same ID.
+    """
+    trace_id = request.headers.get("X-Trace-ID")
+    if not trace_id:
+        trace_id = str(uuid4())
+        request.scope["headers"] = list(request.scope["headers"]) + [(b"x-trace-id", trace_id.encode())]
+
+    session = sampler.start_session()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        response.headers["X-Trace-ID"] = trace_id
+        return response
+    finally:
+        samples = sampler.stop_session(session)
+        duration_ms = (time.perf_counter() - session.started) * 1000
+
+        reason = None
+        if duration_ms >= settings.PROFILE_SLOW_THRESHOLD_MS:
+            reason = "slow"
+        elif random.random() < settings.PROFILE_SAMPLE_RATE:
+            reason = "sampled"
+
+        if reason and samples:
+            try:
+                profile_store.save({
+                    "trace_id": trace_id,
+                    "method": request.method,
+                    "path": request.url.path,
+                    "status_code": status_code,
+                    "duration_ms": round(duration_ms, 2),
+                    "reason": reason,
+                    "interval_ms": settings.PROFILE_INTERVAL_MS,
+                    "sample_count": sum(samples.values()),
+                    "captured_at": time.time(),
+                    "stacks": dict(samples.most_common()),
+                })
+                if reason == "slow":
+                    logger.warning(f"Slow request captured: {request.method} {request.url.path} took {duration_ms:.0f} ms", extra={"trace_id": trace_id})
+            except OSError:
+                logger.exception("Failed to store request profile.", extra={"trace_id": trace_id})
@@ -0,0 +1,5 @@
+import os
+
+# Settings requires these; tests never call the real services.
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("HUGGINGFACEHUB_API_TOKEN", "test")
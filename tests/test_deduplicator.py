@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from langchain.schema import Document
+
+from app.rag.deduplicator import MinHashDeduplicator, deduplicate_chunks
+
+
+def _chunk(text, filename="a.pdf", page=1):
+    return Document(page_content=text, metadata={"filename": filename, "page_number": page})
+
+
+def _words(n, prefix="word"):
+    return " ".join(f"{prefix}{i}" for i in range(n))
+
+
+def test_exact_duplicates_ignore_case_and_whitespace():
+    chunks = [
+        _chunk("Confidential.  All rights reserved.", "a.pdf", 1),
+        _chunk("confidential. all\nrights   reserved. ", "b.pdf", 3),
+        _chunk("Something else entirely.", "c.pdf", 2),
+    ]
+    kept, report = deduplicate_chunks(chunks)
+
+    assert [c.page_content for c in kept] == [chunks[0].page_content, chunks[2].page_content]
+    assert report.exact_duplicates == 1 and report.near_duplicates == 0
+    assert report.chars_removed == len(chunks[1].page_content)
+
+
+def test_sources_and_duplicate_count_point_back_to_collapsed_chunks():
+    footer = "Confidential. All rights reserved."
+    chunks = [_chunk(footer, "a.pdf", 1), _chunk(footer, "b.pdf", 4), _chunk(footer, "a.pdf", 1)]
+    kept, _ = deduplicate_chunks(chunks)
+
+    assert len(kept) == 1
+    assert kept[0].metadata["sources"] == [
+        {"filename": "a.pdf", "page_number": 1},
+        {"filename": "b.pdf", "page_number": 4},
+    ]
+    assert kept[0].metadata["duplicate_count"] == 2
+
+
+def test_near_duplicates_collapse_and_distinct_chunks_stay():
+    base = _words(100)
+    near = base + " extra"
+    distinct = _words(50) + " " + _words(50, "other")
+    kept, report = deduplicate_chunks([_chunk(base, "a.pdf"), _chunk(near, "b.pdf"), _chunk(distinct, "c.pdf")])
+
+    assert [c.metadata["filename"] for c in kept] == ["a.pdf", "c.pdf"]
+    assert report.near_duplicates == 1
+    assert {"filename": "b.pdf", "page_number": 1} in kept[0].metadata["sources"]
+
+
+def test_near_duplicate_threshold_is_inclusive():
+    base, near = _words(60), _words(60) + " tail1 tail2"
+    probe = MinHashDeduplicator()
+    score = float(np.mean(probe.signature(probe.normalize(base)) == probe.signature(probe.normalize(near))))
+    assert score < 1.0
+
+    at, _ = MinHashDeduplicator(threshold=score).deduplicate([_chunk(base), _chunk(near)])
+    above, _ = MinHashDeduplicator(threshold=min(score + 0.01, 1.0)).deduplicate([_chunk(base), _chunk(near)])
+
+    assert len(at) == 1
+    assert len(above) == 2
+
+
+@pytest.mark.parametrize("threshold,num_perm", [(0.85, 128), (0.5, 128), (0.9, 64), (0.7, 100)])
+def test_optimal_bands_puts_the_s_curve_midpoint_just_below_threshold(threshold, num_perm):
+    bands, rows = MinHashDeduplicator._optimal_bands(threshold, num_perm)
+    midpoint = (1.0 / bands) ** (1.0 / rows)
+
+    assert bands * rows == num_perm
+    assert midpoint <= threshold
+    for r in range(1, num_perm + 1):
+        if num_perm % r == 0:
+            other = (1.0 / (num_perm // r)) ** (1.0 / r)
+            assert not midpoint < other <= threshold
+
+
+def test_optimal_bands_for_default_settings():
+    assert MinHashDeduplicator._optimal_bands(0.85, 128) == (16, 8)
+
+
+def test_threshold_must_be_in_range():
+    with pytest.raises(ValueError):
+        MinHashDeduplicator(threshold=0.0)
@@ -0,0 +1,34 @@
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.rag.embedder import _embed_in_batches
+from app.rag.embedding_cache import CachedEmbeddings, EmbeddingCache
+
+
+class LengthEmbeddings(Embeddings):
+    def embed_documents(self, texts):
+        return [[float(len(t)), 1.0] for t in texts]
+
+    def embed_query(self, text):
+        return [float(len(text)), 1.0]
+
+
+def test_uncached_embedding_reports_every_batch():
+    calls = []
+    vectors = _embed_in_batches(LengthEmbeddings(), ["a" * i for i in range(5)], 2, lambda *args: calls.append(args))
+
+    assert vectors.shape == (5, 2)
+    assert calls == [("embedding", 2, 5, 0), ("embedding", 4, 5, 0), ("embedding", 5, 5, 0)]
+
+
+def test_cache_hits_are_reported_separately(tmp_path):
+    texts = ["a", "bb", "ccc", "dddd"]
+    cache = EmbeddingCache(str(tmp_path), "model")
+    cache.put_many(texts[:3], np.asarray(LengthEmbeddings().embed_documents(texts[:3]), dtype=np.float32))
+
+    calls = []
+    embeddings = CachedEmbeddings(cache, LengthEmbeddings)
+    vectors = _embed_in_batches(embeddings, texts, 2, lambda *args: calls.append(args))
+
+    np.testing.assert_array_equal(vectors[:, 0], [1, 2, 3, 4])
+    assert calls == [("embedding", 2, 4, 2), ("embedding", 4, 4, 3)]
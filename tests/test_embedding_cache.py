@@ -0,0 +1,50 @@
+import os
+
+import numpy as np
+
+from app.rag.embedding_cache import EmbeddingCache
+
+
+def _vectors(*values):
+    return np.array([[v, v + 0.5, -v] for v in values], dtype=np.float32)
+
+
+def test_reader_sees_rows_appended_by_another_instance(tmp_path):
+    reader = EmbeddingCache(str(tmp_path), "model")
+    writer = EmbeddingCache(str(tmp_path), "model")
+
+    reader.put_many(["a"], _vectors(1))
+    writer.put_many(["b", "c"], _vectors(2, 3))
+
+    got = reader.get_many(["a", "b", "c"])
+    np.testing.assert_array_equal(np.stack(got), _vectors(1, 2, 3))
+
+
+def test_opening_does_not_truncate_unindexed_rows(tmp_path):
+    writer = EmbeddingCache(str(tmp_path), "model")
+    writer.put_many(["a"], _vectors(1))
+
+    # Simulate a writer that appended rows but has not saved the index yet.
+    vectors_path = os.path.join(writer.directory, "vectors.f32")
+    with open(vectors_path, "ab") as f:
+        f.write(_vectors(9).tobytes())
+    size = os.path.getsize(vectors_path)
+
+    EmbeddingCache(str(tmp_path), "model").get_many(["a"])
+    assert os.path.getsize(vectors_path) == size
+
+
+def test_reader_follows_rows_renumbered_by_gc_in_another_instance(tmp_path):
+    reader = EmbeddingCache(str(tmp_path), "model")
+    reader.put_many(["a", "b", "c", "d", "e"], _vectors(1, 2, 3, 4, 5))
+
+    # Make "d" and "e" the most recently used, then compact down to two rows elsewhere.
+    reader.get_many(["d", "e"])
+    reader.touch()
+    collector = EmbeddingCache(str(tmp_path), "model", max_bytes=3 * 3 * 4)
+    collector.collect_garbage()
+    assert collector.rows == 2
+
+    got = reader.get_many(["a", "b", "d", "e"])
+    assert got[0] is None and got[1] is None
+    np.testing.assert_array_equal(np.stack(got[2:]), _vectors(4, 5))
@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+from langchain.schema import Document
+from langchain_core.embeddings import FakeEmbeddings
+
+from app.rag.index_compression import (
+    build_index,
+    build_vector_store,
+    load_vector_store,
+    measure_recall,
+    rescore,
+    save_vector_store,
+)
+
+
+def _data(n, dim=16, seed=0):
+    vectors = np.random.RandomState(seed).rand(n, dim).astype(np.float32)
+    docs = [Document(page_content=f"doc {i}", metadata={"group": i % 2}) for i in range(n)]
+    return docs, vectors
+
+
+def test_report_records_the_precision_actually_built():
+    docs, vectors = _data(100)
+    _, report = build_vector_store(docs, vectors, FakeEmbeddings(size=16), precision="pq", pca_dim=64)
+
+    assert report["index_factory"] == "SQ8"
+    assert report["precision"] == "int8"
+    assert report["requested_precision"] == "pq"
+    assert report["pca_dim"] == 0
+    assert report["requested_pca_dim"] == 64
+
+
+class _SelfFirstIndex:
+    """Returns each query itself, then the farthest vector: recall is zero once self is excluded."""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def search(self, queries, k):
+        positions = []
+        for q in queries:
+            distances = ((self.vectors - q) ** 2).sum(axis=1)
+            order = np.argsort(distances)
+            positions.append(np.concatenate([order[:1], order[::-1][:k - 1]]))
+        return None, np.array(positions)
+
+
+def test_measure_recall_ignores_self_matches():
+    _, vectors = _data(50)
+    assert measure_recall(_SelfFirstIndex(vectors), vectors, k=1) == 0.0
+
+
+def test_measure_recall_of_exact_index_is_perfect():
+    _, vectors = _data(50)
+    index, *_ = build_index(vectors, "float32")
+    assert measure_recall(index, vectors, k=4) == 1.0
+
+
+def test_rescore_drops_missing_positions_and_pads():
+    full = np.array([[0.0], [3.0], [1.0]], dtype=np.float32)
+    positions, distances = rescore(full, np.array([0.0], dtype=np.float32), np.array([1, -1, 2, 0]), 5)
+
+    np.testing.assert_array_equal(positions, [0, 2, 1, -1, -1])
+    np.testing.assert_array_equal(distances, [0.0, 1.0, 9.0, np.inf, np.inf])
+
+
+def test_search_positions_applies_filter_after_rescoring():
+    docs, vectors = _data(300)
+    store, _ = build_vector_store(docs, vectors, FakeEmbeddings(size=16), precision="int8", rerank_factor=4)
+
+    positions, scores = store.search_positions(vectors[3].tolist(), k=3, filter={"group": 1}, fetch_k=20)
+
+    assert len(positions) == 3
+    assert positions[0] == 3
+    assert all(docs[int(i)].metadata["group"] == 1 for i in positions)
+    assert list(scores) == sorted(scores)
+
+
+@pytest.mark.parametrize("precision,pca_dim", [
+    ("float32", 0), ("float16", 0), ("int8", 0), ("pq", 0), ("int8", 8),
+])
+@pytest.mark.parametrize("mmap", [False, True])
+def test_saved_store_round_trips(tmp_path, precision, pca_dim, mmap):
+    docs, vectors = _data(300)
+    embeddings = FakeEmbeddings(size=16)
+    store, report = build_vector_store(docs, vectors, embeddings, precision=precision, pca_dim=pca_dim)
+    save_vector_store(store, str(tmp_path), report)
+
+    loaded = load_vector_store(str(tmp_path), embeddings, mmap=mmap)
+
+    assert loaded.rerank_factor == report["rerank_factor"]
+    assert (loaded.full_vectors is None) == (not report["rescoring"])
+    for query in vectors[:5]:
+        expected = store.similarity_search_with_score_by_vector(query.tolist(), k=3)
+        got = loaded.similarity_search_with_score_by_vector(query.tolist(), k=3)
+        assert [d.page_content for d, _ in got] == [d.page_content for d, _ in expected]
+        np.testing.assert_allclose([s for _, s in got], [s for _, s in expected], rtol=1e-5)
+
+
+def test_mmap_load_refuses_without_dangerous_deserialization(tmp_path):
+    docs, vectors = _data(20)
+    embeddings = FakeEmbeddings(size=16)
+    store, report = build_vector_store(docs, vectors, embeddings)
+    save_vector_store(store, str(tmp_path), report)
+
+    with pytest.raises(ValueError):
+        load_vector_store(str(tmp_path), embeddings, allow_dangerous_deserialization=False, mmap=True)
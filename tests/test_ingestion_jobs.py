@@ -0,0 +1,87 @@
+import os
+import queue
+
+import pytest
+
+from app.rag import ingestion_jobs
+from app.rag.ingestion_jobs import IngestionJobManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = IngestionJobManager(jobs_path=str(tmp_path), index_root=str(tmp_path))
+    manager._jobs["job"] = {
+        "job_id": "job", "status": "queued", "stage": None, "chunks_done": 0, "chunks_total": 0,
+        "cache_hits": 0, "progress": 0.0, "chunks_per_second": None,
+        "started_at": None, "embedding_started_at": None,
+    }
+    return manager
+
+
+def _drain(manager, monkeypatch, updates):
+    """Feeds (timestamp, stage, done, total, cache_hits) updates through _drain_progress."""
+    progress = queue.Queue()
+    clock = iter([u[0] for u in updates])
+    monkeypatch.setattr(ingestion_jobs.time, "time", lambda: next(clock))
+    for _, stage, done, total, hits in updates:
+        progress.put(("job", {"stage": stage, "chunks_done": done, "chunks_total": total, "cache_hits": hits}))
+    progress.put(None)
+    manager._drain_progress(progress)
+    return manager.get("job")
+
+
+def test_throughput_counts_only_encoded_chunks(manager, monkeypatch):
+    job = _drain(manager, monkeypatch, [
+        (100.0, "embedding", 0, 10000, 0),
+        (100.01, "embedding", 9900, 10000, 9900),
+        (101.0, "embedding", 10000, 10000, 9900),
+        (101.5, "indexing", 10000, 10000, 0),
+    ])
+    assert job["chunks_per_second"] == 100.0
+    assert job["cache_hits"] == 9900
+    assert job["progress"] == 1.0
+
+
+def test_uncached_batches_move_progress(manager, monkeypatch):
+    job = _drain(manager, monkeypatch, [
+        (10.0, "embedding", 0, 1000, 0),
+        (12.0, "embedding", 256, 1000, 0),
+    ])
+    assert job["progress"] == 0.256
+    assert job["chunks_per_second"] == 128.0
+
+
+
+class _Future:
+    def add_done_callback(self, callback):
+        pass
+
+    def exception(self):
+        return None
+
+    def result(self):
+        return {"index_version": "v1", "report": {}}
+
+
+class _Pool:
+    def submit(self, *args):
+        return _Future()
+
+
+def test_finished_jobs_leave_memory_and_old_status_files_are_trimmed(tmp_path, monkeypatch):
+    manager = IngestionJobManager(jobs_path=str(tmp_path), index_root=str(tmp_path), max_stored_jobs=2)
+    monkeypatch.setattr(manager, "_ensure_pool", _Pool)
+
+    finished = []
+    for i in range(4):
+        job_id = manager.submit("docs")["job_id"]
+        manager._finish(job_id, _Future())
+        # Distinct mtimes so the trimming order is deterministic.
+        os.utime(tmp_path / f"{job_id}.json", (i, i))
+        finished.append(job_id)
+    running = manager.submit("docs")["job_id"]
+
+    assert list(manager._jobs) == [running]
+    assert manager.get(finished[0]) is None
+    assert manager.get(finished[3])["status"] == "succeeded"
+    assert sorted(p.stem for p in tmp_path.glob("*.json")) == sorted([finished[3], running])
@@ -0,0 +1,32 @@
+from app.utils.profiler import ProfileStore
+
+
+def _profile(trace_id, captured_at=0.0):
+    return {"trace_id": trace_id, "captured_at": captured_at, "stacks": {"main (app.py:1)": 1}}
+
+
+def test_trace_ids_sharing_a_basename_do_not_overwrite_each_other(tmp_path):
+    store = ProfileStore(str(tmp_path))
+    store.save(_profile("a/x", 1.0))
+    store.save(_profile("b/x", 2.0))
+
+    assert store.get("a/x")["trace_id"] == "a/x"
+    assert store.get("b/x")["trace_id"] == "b/x"
+    assert [p["trace_id"] for p in store.list()] == ["b/x", "a/x"]
+
+
+def test_trace_id_cannot_escape_the_store(tmp_path):
+    store = ProfileStore(str(tmp_path / "profiles"))
+    store.save(_profile("../../escape"))
+
+    assert list((tmp_path / "profiles").iterdir())
+    assert not (tmp_path / "escape.json").exists()
+    assert store.get("../../escape") is not None
+
+
+def test_oldest_profiles_are_trimmed(tmp_path):
+    store = ProfileStore(str(tmp_path), max_profiles=2)
+    for i in range(4):
+        store.save(_profile(f"t{i}", float(i)))
+
+    assert len(store.list()) == 2
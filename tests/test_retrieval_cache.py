@@ -0,0 +1,92 @@
+import os
+
+import numpy as np
+import pytest
+
+from app.rag.retrieval_cache import RetrievalCache
+
+
+def _result(*positions):
+    return np.array(positions, dtype=np.int64), np.arange(len(positions), dtype=np.float32)
+
+
+def test_make_key_normalizes_case_whitespace_and_unicode():
+    key = RetrievalCache.make_key("v1", "What is  the\tleave POLICY?", 4)
+
+    assert key == RetrievalCache.make_key("v1", "  what is the leave policy? ", 4)
+    assert key == RetrievalCache.make_key("v1", "What is the leave ＰＯＬＩＣＹ?", 4)
+    assert key != RetrievalCache.make_key("v2", "what is the leave policy?", 4)
+    assert key != RetrievalCache.make_key("v1", "what is the leave policy?", 5)
+    assert key != RetrievalCache.make_key("v1", "what is the leave policy?", 4, {"filename": "a.pdf"})
+
+
+def test_lru_evicts_least_recently_used():
+    cache = RetrievalCache(max_entries=2)
+    cache.put("a", "v1", *_result(1))
+    cache.put("b", "v1", *_result(2))
+    cache.get("a")
+    cache.put("c", "v1", *_result(3))
+
+    assert cache.get("b") is None
+    np.testing.assert_array_equal(cache.get("a")[0], [1])
+    np.testing.assert_array_equal(cache.get("c")[0], [3])
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.rag.retrieval_cache.time.time", lambda: now[0])
+    cache = RetrievalCache(ttl_seconds=10)
+    cache.put("a", "v1", *_result(1))
+
+    now[0] += 9
+    assert cache.get("a") is not None
+    now[0] += 2
+    assert cache.get("a") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_shared_store_serves_other_instances_and_invalidates_old_versions(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    writer = RetrievalCache(shared_path=path)
+    writer.put("old", "v1", *_result(1))
+    writer.put("new", "v2", *_result(2, 3))
+
+    reader = RetrievalCache(shared_path=path)
+    positions, scores = reader.get("new")
+    np.testing.assert_array_equal(positions, [2, 3])
+    np.testing.assert_array_equal(scores, [0, 1])
+
+    writer.invalidate(keep_version="v2")
+    assert RetrievalCache(shared_path=path).get("old") is None
+    assert RetrievalCache(shared_path=path).get("new") is not None
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork()")
+def test_forked_child_opens_its_own_connection(tmp_path):
+    cache = RetrievalCache(shared_path=str(tmp_path / "cache.sqlite"))
+    cache.put("a", "v1", *_result(1))
+    parent_conn = cache._connection()
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            os.close(read_fd)
+            cache._entries.clear()
+            fresh = cache._connection() is not parent_conn
+            hit = cache.get("a") is not None
+            cache.put("b", "v1", *_result(2))
+            status = 0 if fresh and hit else 2
+        finally:
+            os.write(write_fd, bytes([status]))
+            os._exit(0)
+
+    os.close(write_fd)
+    status = os.read(read_fd, 1)
+    os.close(read_fd)
+    os.waitpid(pid, 0)
+
+    assert status == b"\x00"
+    assert cache._connection() is parent_conn
+    np.testing.assert_array_equal(cache.get("b")[0], [2])